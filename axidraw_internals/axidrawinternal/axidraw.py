@@ -49,6 +49,8 @@ from axidrawinternal import pen_handling
 from axidrawinternal import plot_warnings
 from axidrawinternal import serial_utils
 from axidrawinternal import motion
+from axidrawinternal import move_cache
+from axidrawinternal import move_stream
 from axidrawinternal import dripfeed
 from axidrawinternal import preview
 
@@ -91,6 +93,7 @@ class AxiDraw(inkex.Effect):
         self.pen = pen_handling.PenHandler()
         self.warnings = plot_warnings.PlotWarnings()
         self.preview = preview.Preview()
+        self.move_cache = move_cache.MoveCache()
 
         self.spew_debugdata = False # Possibly add this as a PlotStatus variable
         self.set_defaults()
@@ -295,6 +298,8 @@ class AxiDraw(inkex.Effect):
 
         if self.options.digest > 1: # Generate digest only; do not run plot or preview
             self.options.preview = True # Disable serial communication; restrict certain functions
+        if self.options.mode == "compile": # Plan moves and save to file only; do not plot
+            self.options.preview = True
 
         if not self.options.preview:
             self.serial_connect()
@@ -318,11 +323,20 @@ class AxiDraw(inkex.Effect):
             self.warnings.report(self.called_externally, self.user_message_fun) # print warnings
             return
 
+        if self.options.mode == "moves": # Plot from move stream file; no SVG file needed
+            self.plot_move_stream()
+            if self.plot_status.port is not None:
+                ebb_motion.doTimedPause(self.plot_status.port, 10, False) # Final timed command
+                if self.options.port is None:  # Do not close serial port if opened externally.
+                    self.disconnect()
+            self.warnings.report(self.called_externally, self.user_message_fun) # print warnings
+            return
+
         self.svg = self.document.getroot()
         self.plot_status.resume.update_needed = False
         self.plot_status.resume.new.model = self.options.model # Save model in file
 
-        if self.options.mode in ("plot", "layers", "res_plot", "res_home"):
+        if self.options.mode in ("plot", "layers", "res_plot", "res_home", "compile"):
             # Read saved data from SVG file, including plob version information
             self.plot_status.resume.read_from_svg(self.svg)
 
@@ -397,6 +411,12 @@ class AxiDraw(inkex.Effect):
 
             self.plot_cleanup() # Revert document, print time reports, send webhooks
 
+        elif self.options.mode == "compile":
+            self.plot_status.resume.new.layer = -1  # Compile all layers
+            if not self.prepare_document():
+                return
+            self.compile_document()
+
         elif self.options.mode  == "res_home":
             self.plot_status.resume.copy_old()
             self.pen.phys.xpos = self.plot_status.resume.old.last_x
@@ -711,7 +731,7 @@ class AxiDraw(inkex.Effect):
                 self.go_to_position(self.params.start_pos_x, self.params.start_pos_y)
 
         finally: # In case of an exception and loss of the serial port...
-            pass
+            dripfeed.close_writer(self) # Stop the writer thread used for this plot
 
         self.plot_status.progress.close()
 
@@ -773,6 +793,83 @@ class AxiDraw(inkex.Effect):
                     self.user_message_fun("An error occurred while posting webhook. " +
                         "Check your internet connection and webhook URL.\n")
 
+    def compile_document(self):
+        """
+        Plan all moves for the prepared document, and save them as a move stream
+        file, to be plotted later in "moves" mode. See move_stream.py.
+        """
+        if not self.options.moves_file:
+            logger.error(gettext.gettext('No move stream file (moves_file) selected.'))
+            return
+
+        move_list = move_stream.plan_document(self, self.digest)
+        try:
+            move_stream.save(self.options.moves_file, move_list, str(self.digest.name),
+                self.options.model, self.options.resolution)
+        except OSError as err:
+            logger.error(gettext.gettext('Unable to write move stream file: ') + str(err))
+            return
+
+        elapsed_time = time.time() - self.start_time
+        self.time_elapsed = elapsed_time # Available for use by python API
+        if self.options.report_time and not self.called_externally:
+            self.user_message_fun(f"Compiled {len(move_list)} commands to " +
+                f"{self.options.moves_file}; elapsed time: " +
+                text_utils.format_hms(elapsed_time))
+
+    def plot_move_stream(self):
+        """
+        Plot a move stream file, as saved in "compile" mode, in place of an SVG document.
+        Motion was planned when compiling; moves are fed to the AxiDraw directly.
+        """
+        if not self.options.moves_file:
+            logger.error(gettext.gettext('No move stream file (moves_file) selected.'))
+            return
+        try:
+            stream = move_stream.load(self.options.moves_file)
+        except (OSError, ValueError) as err:
+            logger.error(gettext.gettext('Unable to read move stream file: ') + str(err))
+            return
+        if stream.metadata['model'] != self.options.model:
+            logger.error(gettext.gettext(
+                'Move stream file was compiled for a different AxiDraw model.'))
+            return
+        self.options.resolution = stream.metadata['resolution'] # Resolution of compiled moves
+
+        self.plot_status.copies_to_plot = self.options.copies
+        if self.plot_status.copies_to_plot == 0: # Special case: Continuous copies selected
+            self.plot_status.copies_to_plot = -1 # Flag for continuous copies
+        if self.options.preview: # Compiled pages have identical print time
+            self.plot_status.copies_to_plot = 1
+        self.options.rendering = 0 # No SVG document to render previews into
+
+        first_copy = True
+        try:
+            while self.plot_status.copies_to_plot != 0:
+                self.plot_status.copies_to_plot -= 1
+                if first_copy:
+                    first_copy = False
+                else:
+                    self.plot_status.stats.next_page() # Update distance stats for next page
+
+                if not self.options.preview:
+                    self.plot_status.resume.clear_button(self) # Query button to clear its state
+                    self.query_ebb_voltage()
+                self.pen.servo_init(self)
+                self.pen.pen_raise(self)
+                self.enable_motors()  # Set plotting resolution
+                dripfeed.feed(self, stream)
+                self.pen.pen_raise(self)
+                dripfeed.page_layer_delay(self, between_pages=True) # Delay between pages
+        finally:
+            dripfeed.close_writer(self) # Stop the writer thread used for these copies
+
+        elapsed_time = time.time() - self.start_time
+        self.time_elapsed = elapsed_time # Available for use by python API
+        if not self.called_externally: # Compile time estimates & print time reports
+            self.plot_status.stats.report(self.options, self.user_message_fun, elapsed_time)
+            self.pen.status.report(self, self.user_message_fun)
+
     def plot_doc_digest(self, digest):
         """
         Step through the document digest and plot each of the vertex lists.
@@ -785,7 +882,9 @@ class AxiDraw(inkex.Effect):
         if not digest:
             return
 
-        for layer in digest.layers:
+        self.move_cache.use_digest(digest) # Reuse planned moves if the digest is unchanged
+
+        for layer_index, layer in enumerate(digest.layers):
 
             self.pen.end_temp_height(self)
             old_use_layer_speed = self.use_layer_speed  # A Boolean
@@ -798,10 +897,10 @@ class AxiDraw(inkex.Effect):
 
             self.eval_layer_props(layer.props)
 
-            for path_item in layer.paths:
+            for path_index, path_item in enumerate(layer.paths):
                 if self.plot_status.stopped:
                     return
-                self.plot_polyline(path_item.subpaths[0])
+                self.plot_polyline(path_item.subpaths[0], (layer_index, path_index))
             self.use_layer_speed = old_use_layer_speed # Restore old layer status variables
 
             if self.layer_speed_pendown != old_layer_speed_pendown:
@@ -837,12 +936,14 @@ class AxiDraw(inkex.Effect):
         if self.layer_speed_pendown != old_speed:
             self.enable_motors()  # Set speed value variables for this layer.
 
-    def plot_polyline(self, vertex_list):
+    def plot_polyline(self, vertex_list, cache_key=None):
         """
         Plot a polyline object; a single pen-down XY movement.
         - No transformations, no curves, no neat clipping at document bounds;
             those are all performed _before_ we get to this point.
         - Truncate motion, brute-force, at travel bounds, without mercy or printed warnings.
+        - cache_key: (layer index, path index) of the polyline within the digest being
+            plotted, to reuse moves from self.move_cache. None plans without the cache.
         """
 
         if self.plot_status.stopped:
@@ -857,6 +958,26 @@ class AxiDraw(inkex.Effect):
 
         self.pen.pen_raise(self) # Raise, if necessary, prior to pen-up travel to first vertex
 
+        move_list = None
+        if cache_key is not None:
+            move_list = self.move_cache.get(self, cache_key)
+        if move_list is None:
+            x_start = self.pen.phys.xpos
+            y_start = self.pen.phys.ypos
+            move_list = self.plan_polyline(vertex_list)
+            if cache_key is not None:
+                self.move_cache.put(self, cache_key, x_start, y_start, move_list)
+
+        dripfeed.feed(self, move_list)
+
+    def plan_polyline(self, vertex_list):
+        """
+        Plan the moves for plot_polyline(), starting from the current pen position:
+        pen-up travel to the first vertex, followed by the pen-down trajectory.
+        Vertices are limited to the travel bounds in a copy of vertex_list, leaving
+        the digest unchanged so that its move cache fingerprint stays valid.
+        """
+        vertex_list = [list(vertex) for vertex in vertex_list]
         for vertex in vertex_list:
             vertex[0], _t_x = plot_utils.checkLimitsTol(vertex[0], 0, self.bounds[1][0], 2e-9)
             vertex[1], _t_y = plot_utils.checkLimitsTol(vertex[1], 0, self.bounds[1][1], 2e-9)
@@ -864,11 +985,16 @@ class AxiDraw(inkex.Effect):
             #     logger.debug('Travel truncated to bounds at plot_polyline.')
 
         # Pen up straight move, zero velocity at endpoints, to first vertex location
-        self.go_to_position(vertex_list[0][0], vertex_list[0][1])
+        xyz_pos = copy.copy(self.pen.phys)
+        target_data = (vertex_list[0][0], vertex_list[0][1], 0, 0, False)
+        move_list, data_list = motion.compute_segment(self, target_data, xyz_pos)
+        if data_list is not None:
+            xyz_pos.xpos = data_list[0]
+            xyz_pos.ypos = data_list[1]
 
-        # Plan and feed trajectory, including lowering and raising pen before and after:
-        the_trajectory = motion.trajectory(self, vertex_list)
-        dripfeed.feed(self, the_trajectory[0])
+        # Plan trajectory, including lowering and raising pen before and after:
+        the_trajectory = motion.trajectory(self, vertex_list, xyz_pos)
+        return (move_list or []) + the_trajectory[0]
 
     def go_to_position(self, x_dest, y_dest, ignore_limits=False, xyz_pos=None):
         '''
@@ -1012,6 +1138,7 @@ class AxiDraw(inkex.Effect):
 
     def disconnect(self):
         '''End serial session; disconnect from AxiDraw '''
+        dripfeed.close_writer(self) # Writer thread from moves outside of a plot, if any
         if self.plot_status.port:
             ebb_serial.closePort(self.plot_status.port)
         self.plot_status.port = None
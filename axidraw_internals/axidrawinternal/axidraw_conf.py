@@ -111,6 +111,9 @@ digest = 0              # Plot digest output option. (NOT supported in Inkscape
                             # 1: Output "plob" digest, not full SVG, when saving file
                             # 2: Disable plots and previews; generate digest only
 
+moves_file = None       # Move stream file: fully planned plot, written in 'compile' mode
+                            # and plotted in 'moves' mode. (NOT supported in Inkscape context.)
+
 progress = False        # Enable progress bar display in AxiDraw CLI, when True
                             # Default False
                             # This option has no effect in Inkscape or Python API contexts.
@@ -271,6 +274,14 @@ time_slice = 0.025  # Interval, in seconds, of when to update the motors. Defaul
 
 button_interval = 0.05  # Minimum interval (s), for polling pause button. Default: 0.05 (50 ms)
 
+# Pipelined plotting: Moves are sent to the AxiDraw from a background thread; see serial_writer.py
+fifo_lookahead = 50     # Motion time (ms) to keep queued in the AxiDraw ahead of the current move.
+                        #   Pauses take effect within about this much motion. Default: 50
+                        #   0: Disable background thread; send each move and sleep during it.
+fifo_queue_length = 4   # Maximum number of moves waiting to be sent by the thread. Default: 4
+fifo_query = False      # Use QG queries (firmware 2.6.2+) to detect when queued motion has
+                        #   finished earlier than expected. Default: False
+
 bounds_tolerance = 0.003  # Suppress warnings if bounds are exceeded by less than this distance (inches).
 
 cornering = 10.0        # Cornering speed factor (default: 10.0)
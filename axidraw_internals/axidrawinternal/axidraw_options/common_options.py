@@ -158,6 +158,11 @@ def core_options(parser, config):
                         + "1: Output 'plob' digest, not full SVG, when saving file. "\
                         + "2: Disable plots and previews; generate digest only. ")
 
+    options.add_option("--moves_file",\
+                        type="string", action="store", dest="moves_file",\
+                        default=config["moves_file"],\
+                        help="Move stream file written in compile mode and plotted in moves mode")
+
     options.add_option("--webhook",\
                         type="inkbool", action="store", dest="webhook",\
                         default=config["webhook"],\
@@ -182,7 +187,7 @@ def core_mode_options(parser, config):
                         action="store", type="string", dest="mode",\
                         default=config["mode"], \
                         help="Mode or GUI tab. One of: [plot, layers, align, toggle, cycle"\
-                        + ", manual, sysinfo, version, res_plot, res_home]. Default: plot.")
+                        + ", manual, sysinfo, version, res_plot, res_home, compile, moves]. Default: plot.")
 
     options.add_option("--manual_cmd",\
                         type="string", action="store", dest="manual_cmd",\
@@ -35,6 +35,8 @@ ebb_serial = from_dependency_import('plotink.ebb_serial')  # https://github.com/
 ebb_motion = from_dependency_import('plotink.ebb_motion')
 plot_utils = from_dependency_import('plotink.plot_utils')
 
+from axidrawinternal import serial_writer
+
 def feed(ad_ref, move_list):
     """
     Feed individual motion actions to the AxiDraw during a plot or preview.
@@ -63,8 +65,55 @@ def feed(ad_ref, move_list):
     # drip_logger.debug('\ndripfeed.feed()\n')
     # drip_logger.debug('move_list:\n' + str(move_list)) # Can print full move list
 
+    writer = get_writer(ad_ref) # Background thread for sending moves, or None
+    try:
+        feed_moves(ad_ref, move_list, drip_logger, writer)
+    finally:
+        if writer is not None:
+            writer.drain() # Send remaining queued moves before the caller uses the port
+
+
+def get_writer(ad_ref):
+    """
+    Return the serial_writer.SerialWriter that sends moves during the current plot,
+    starting it if needed, or None if moves are not sent through a writer.
+    The writer is kept in ad_ref.plot_status, so that a single writer thread serves
+    every feed() call of a plot. Stop it with close_writer().
+    """
+
+    if ad_ref.options.preview or ad_ref.plot_status.port is None\
+            or ad_ref.params.fifo_lookahead <= 0:
+        return None
+    writer = ad_ref.plot_status.writer
+    if writer is None or writer.port is not ad_ref.plot_status.port\
+            or not writer.thread.is_alive(): # Port reopened, or writer stopped
+        close_writer(ad_ref)
+        writer = serial_writer.SerialWriter(ad_ref)
+        ad_ref.plot_status.writer = writer
+    return writer
+
+
+def close_writer(ad_ref):
+    """ Send any queued moves, and stop the writer thread started by get_writer() """
+
+    writer = ad_ref.plot_status.writer
+    if writer is not None:
+        ad_ref.plot_status.writer = None
+        writer.close()
+
+
+def feed_moves(ad_ref, move_list, drip_logger, writer):
+    """
+    Feed each action of move_list in turn, as described for feed().
+    If writer is not None, queue SM moves to send through it, and wait for
+    queued moves to be sent before any other action.
+    """
+
     for move in move_list:
-        ad_ref.pause_check()
+        if writer is None:
+            ad_ref.pause_check()
+        else:
+            pause_check_queued(ad_ref, writer, drip_logger)
 
         if ad_ref.plot_status.stopped:
             ad_ref.plot_status.copies_to_plot = 0
@@ -72,20 +121,77 @@ def feed(ad_ref, move_list):
         if ad_ref.pen.phys.xpos is None:
             return # Physical location is not well-defined; stop here.
 
+        if move[0] == 'SM':
+            feed_sm(ad_ref, move, drip_logger, writer)
+            continue
+
+        if writer is not None:
+            writer.drain() # Other actions follow all queued motion
+
         if move[0] == 'lower':
-            ad_ref.pen.pen_lower(ad_ref)
+            ad_ref.pen.pen_lower(ad_ref, move[1])
             continue
 
         if move[0] == 'raise':
-            ad_ref.pen.pen_raise(ad_ref)
+            ad_ref.pen.pen_raise(ad_ref, move[1])
             continue
 
-        if move[0] == 'SM':
-            feed_sm(ad_ref, move, drip_logger)
+        # Layer actions, as found in compiled move streams; see move_stream.py
+        if move[0] == 'delay':
+            page_layer_delay(ad_ref, between_pages=False, delay_ms=move[1])
+            continue
+
+        if move[0] == 'height': # New height will be used when we next lower the pen.
+            if move[1] is None:
+                ad_ref.pen.end_temp_height(ad_ref)
+            else:
+                ad_ref.pen.set_temp_height(ad_ref, move[1])
+            continue
+
+        if move[0] == 'pause': # Programmatic pause
+            if not ad_ref.plot_status.progress.dry_run: # Skip during dry run only
+                if ad_ref.plot_status.stopped == 0: # If not already stopped
+                    ad_ref.plot_status.stopped = -1 # Set flag for programmatic pause
+                ad_ref.pause_check()  # Carry out the pause, or resume if required.
             continue
 
 
-def feed_sm(ad_ref, move, drip_logger):
+def pause_check_queued(ad_ref, writer, drip_logger):
+    """
+    Run ad_ref.pause_check() while SM moves may be queued in writer, but not yet
+    sent. Position and distance are rolled back to the last move sent while
+    checking, so that a pause takes effect from there: If the plot stops, the
+    queued moves are discarded. Otherwise, they are kept and nothing changes.
+    A button press already read by the writer's QG queries counts as a press here.
+    """
+
+    stats = ad_ref.plot_status.stats
+    with writer.port_lock: # No moves are sent while checking
+        if writer.pause_pending:
+            writer.pause_pending = False
+            ad_ref.plot_status.resume.button_pending = True # See ResumeStatus.check_button()
+        pending = [item[2] for item in writer.queue] # Safe: Only sends remove items
+        if not pending:
+            ad_ref.pause_check()
+            return
+
+        distances = (stats.up_travel_inch, stats.down_travel_inch)
+        for _x_start, _y_start, pen_up, move_dist in pending:
+            stats.add_dist(pen_up, -move_dist)
+        paused_dist = stats.down_travel_inch
+
+        ad_ref.pause_check()
+
+        if not ad_ref.plot_status.stopped:
+            stats.up_travel_inch, stats.down_travel_inch = distances # Restore exactly
+            return
+        writer.cancel()
+    ad_ref.pen.phys.xpos, ad_ref.pen.phys.ypos = pending[0][:2] # Start of first discarded move
+    drip_logger.debug('Discarded %d queued moves; paused after %.4f in of pen-down travel',
+        len(pending), paused_dist)
+
+
+def feed_sm(ad_ref, move, drip_logger, writer=None):
     """
     Manage the process of sending a single "SM" move command to the AxiDraw,
         and simulate doing so when in preview mode.
@@ -94,7 +200,7 @@ def feed_sm(ad_ref, move, drip_logger):
         Updating previews
         Updating progress bar (CLI)
         Keeping track of total distance traveled, pen-up and pen-down
-        Sleeping during long moves
+        Sleeping during long moves, or queueing moves to send from a writer thread
         Reporting errors to the user
     """
 
@@ -121,6 +227,10 @@ def feed_sm(ad_ref, move, drip_logger):
 
         ad_ref.preview.log_sm_move(ad_ref, move)
 
+    elif writer is not None: # Queue move; the writer thread paces the EBB motion FIFO
+        writer.put(f'SM,{move_time},{move_steps1},{move_steps2}\r', move_time,
+            (ad_ref.pen.phys.xpos, ad_ref.pen.phys.ypos, ad_ref.pen.phys.z_up, move_dist))
+
     else:
         ebb_motion.doXYMove(ad_ref.plot_status.port, move_steps2, move_steps1,\
             move_time, False)
@@ -32,9 +32,13 @@ import math
 import logging
 from array import array
 
+import numpy as np
+
 from axidrawinternal.plot_utils_import import from_dependency_import # plotink
 plot_utils = from_dependency_import('plotink.plot_utils')
 
+BATCH_MIN_SEGMENTS = 64 # Polylines with fewer segments are planned one segment at a time
+
 def trajectory(ad_ref, vertex_list, xyz_pos=None):
     """
     Plan the trajectory for a full path, beginning with lowering the pen and ending with
@@ -84,6 +88,58 @@ def trajectory(ad_ref, vertex_list, xyz_pos=None):
     return move_list, data_list
 
 
+def dashed_trajectory(ad_ref, vertex_list, dash_breaks, xyz_pos=None):
+    """
+    Plan the trajectory for a dashed path, as a single continuous motion.
+
+    The full vertex list is planned once, with pen-down speed and acceleration
+    settings, so that velocity is carried through the gaps between dashes rather
+    than coming to a stop at the end of every dash. Pen lifts and lowers are
+    interleaved with the SM moves, issued without a servo settling delay, so
+    that the carriage keeps moving while the pen changes state.
+
+    Inputs: ad_ref: reference to an AxiDraw() object with its settings
+            Ordered (x,y) pair vertex list, corresponding to a single polyline.
+            dash_breaks: Ascending list of distances (inches) along the path at
+                which the pen changes state. The pen is down at the start of
+                the path, up after the first break, down after the second, ...
+            xyz_pos: A pen_handling.PenPosition object, as in trajectory().
+
+    Output: move_list, data_list, as in trajectory(). Pen state changes take
+            effect at the SM move boundary nearest to each break, so dash ends
+            are placed to within one time slice of travel.
+    """
+
+    if xyz_pos is None:
+        xyz_pos = copy.copy(ad_ref.pen.phys)
+    xyz_pos.z_up = False # Plan with pen-down speed and acceleration throughout
+    traj = plan_trajectory(ad_ref, vertex_list, xyz_pos)
+    if traj is None:
+        return None
+    middle_moves, data_list = traj
+    if middle_moves is None:
+        return None
+
+    move_list = [['lower', None]]
+    pen_up = False
+    next_break = 0
+    distance = 0
+    for move in middle_moves:
+        midpoint = distance + move[2][3] / 2
+        while next_break < len(dash_breaks) and dash_breaks[next_break] <= midpoint:
+            pen_up = not pen_up
+            next_break += 1
+            # Zero delay: the servo moves while the following SM moves execute
+            move_list.append(['raise', 0] if pen_up else ['lower', 0])
+            if move_list[-2][0] in ('raise', 'lower'):
+                del move_list[-2:] # Dash or gap shorter than one move; skip it
+        distance += move[2][3]
+        move_list.append(move)
+    move_list.append(['raise', None])
+
+    return move_list, data_list
+
+
 def plan_trajectory(ad_ref, vertex_list, xyz_pos=None):
     """
     Plan the trajectory for a full path, accounting for acceleration.
@@ -111,6 +167,147 @@ def plan_trajectory(ad_ref, vertex_list, xyz_pos=None):
                 * final pen_up, boolean
                 * Distance plotted
                 * execution time to plot this element  (possible future addition)
+
+    Vertex velocities are planned with plan_velocities(), over the whole vertex
+    list at once, and the segment moves with compute_segments(). See
+    plan_trajectory_reference() for the vertex-by-vertex implementation,
+    including a full description of the velocity rules; it is also used for
+    short vertex lists, where setting up the arrays costs more than it saves.
+    """
+
+    if len(vertex_list) < BATCH_MIN_SEGMENTS: # Array setup costs more than it saves
+        return plan_trajectory_reference(ad_ref, vertex_list, xyz_pos)
+
+    if ad_ref.pen.phys.xpos is None:
+        return None, None
+
+    if xyz_pos is None:
+        xyz_pos = copy.copy(ad_ref.pen.phys)
+
+    f_pen_up = xyz_pos.z_up
+
+    if f_pen_up:
+        speed_limit = ad_ref.speed_penup  # For pen-up manual moves
+        accel_rate = ad_ref.params.accel_rate_pu * ad_ref.options.accel / 100.0
+    else:
+        speed_limit = ad_ref.speed_pendown  # Maximum travel rate (in/s), in XY plane.
+        accel_rate = ad_ref.params.accel_rate * ad_ref.options.accel / 100.0
+
+    if ad_ref.options.resolution == 1:  # High-resolution mode
+        min_dist = ad_ref.params.max_step_dist_hr # Skip segments likely to be < one step
+    else:
+        min_dist = ad_ref.params.max_step_dist_lr # Skip segments likely to be < one step
+
+    delta = ad_ref.params.cornering / 5000  # Corner rounding/tolerance factor.
+
+    trimmed_path, traj_vels = plan_velocities(vertex_list, min_dist, speed_limit,
+        accel_rate, delta)
+
+    if len(trimmed_path) < 1:
+        return None, None # Handle zero-segment plot
+
+    if len(trimmed_path) < 2: # plot the element if it is just a line
+        x_dest, y_dest = trimmed_path[0].tolist()
+        return compute_segment(ad_ref, (x_dest, y_dest, 0, 0, False), xyz_pos)
+
+    return compute_segments(ad_ref, trimmed_path, traj_vels, xyz_pos)
+
+
+def plan_velocities(vertex_list, min_dist, speed_limit, accel_rate, delta):
+    """
+    Vectorized vertex velocity planning, for plan_trajectory().
+
+    Applies the same rules as plan_trajectory_reference(): segments shorter than
+    min_dist are skipped, each vertex is limited by the speed limit, by the
+    cornering velocity and by acceleration from the previous vertex, and then
+    by deceleration to the following vertex.
+
+    Working with squared velocities w = v^2, acceleration over a distance d is
+    additive, w_next <= w + 2 a d. With S the cumulative path length, the
+    forward limit at vertex i is therefore the minimum over j <= i of
+    c[j] + 2 a (S[i] - S[j]), where c holds the speed and cornering limits,
+    and the backward limit is the minimum over j >= i of w[j] + 2 a (S[j] - S[i]).
+    Both are running minima, computed with numpy.minimum.accumulate.
+
+    Inputs: vertex_list: Ordered (x,y) pair vertex list, or an Nx2 array.
+            min_dist: Minimum segment length; shorter segments are skipped.
+            speed_limit: Maximum speed (in/s).
+            accel_rate: Acceleration rate (in/s^2).
+            delta: Corner rounding/tolerance factor.
+
+    Output: trimmed_path, traj_vels
+            trimmed_path: Kx2 array of the vertices to move to, excluding the
+                starting vertex and any skipped vertices.
+            traj_vels: Velocities at the start vertex and at each trimmed_path
+                vertex, K + 1 values, beginning and ending with zero.
+    """
+
+    vertices = np.asarray(vertex_list, dtype=float)
+    vertex_count = len(vertices)
+
+    # Skip near-zero length segments. Lengths are measured from the last kept
+    # vertex, so only runs of short segments need a vertex-by-vertex look.
+    seg_dists = np.hypot(*np.diff(vertices, axis=0).T)
+    keep = np.empty(vertex_count, dtype=bool)
+    keep[0] = True
+    keep[1:] = seg_dists >= min_dist
+    resume = 1
+    for start in np.flatnonzero(~keep).tolist():
+        if start < resume:
+            continue
+        anchor = vertices[start - 1]
+        i = start
+        while i < vertex_count:
+            if math.dist(vertices[i], anchor) >= min_dist:
+                keep[i] = True
+                break
+            keep[i] = False
+            i += 1
+        resume = i + 1
+
+    kept = vertices[keep]
+    deltas = np.diff(kept, axis=0)
+    traj_dists = np.hypot(deltas[:, 0], deltas[:, 1])
+    trimmed_path = kept[1:]
+    traj_length = len(kept)
+    if traj_length < 3:
+        return trimmed_path, np.zeros(traj_length, dtype=np.float32)
+
+    # Junction velocity limits, from the angle between incoming and outgoing segments.
+    traj_vectors = deltas / traj_dists[:, None]
+    cosine_factor = -np.einsum('ij,ij->i', traj_vectors[:-1], traj_vectors[1:])
+    root_factor = np.sqrt(np.clip((1 - cosine_factor) / 2, 0, 1))
+    denominator = 1 - root_factor
+    rfactor = np.full(len(denominator), 100000.0)
+    np.divide(delta * root_factor, denominator, out=rfactor, where=denominator > 0.0001)
+    vjunction_max = np.sqrt(accel_rate * rfactor)
+
+    # Squared velocity limits at each vertex, zero at both ends.
+    limits = np.zeros(traj_length)
+    limits[1:-1] = np.minimum(vjunction_max, speed_limit) ** 2
+
+    path_dist = np.zeros(traj_length)
+    np.cumsum(traj_dists, out=path_dist[1:])
+    accel_dist = 2 * accel_rate * path_dist
+
+    # Forward pass: acceleration from earlier vertices.
+    vels_sq = np.minimum.accumulate(limits - accel_dist) + accel_dist
+    vels_sq[-1] = 0.0
+
+    # Backward pass: deceleration to later vertices.
+    vels_sq = np.minimum.accumulate((vels_sq + accel_dist)[::-1])[::-1] - accel_dist
+
+    # Single precision, as in the array('f') of plan_trajectory_reference(), so that
+    # vertices at the speed limit give the same segment profiles.
+    return trimmed_path, np.sqrt(np.clip(vels_sq, 0, None)).astype(np.float32)
+
+
+def plan_trajectory_reference(ad_ref, vertex_list, xyz_pos=None):
+    """
+    Reference implementation of plan_trajectory(), planning vertex velocities
+    one vertex at a time. Kept for validating the vectorized plan_velocities().
+
+    Inputs and output as in plan_trajectory().
     """
     spew_trajectory_debug_data = False # Set True to get entirely too much debugging data
 
@@ -925,7 +1122,6 @@ def compute_segment(ad_ref, data, xyz_pos=None):
         fractional_distance = dist_array[index] / position # Position along intended path
         dest_array1.append(int(round(fractional_distance * motor_steps1)))
         dest_array2.append(int(round(fractional_distance * motor_steps2)))
-        sum(dest_array1)
 
     # seg_logger.debug('\nSanity check after computing motion:')
     # seg_logger.debug('Final motor_steps1: %s', dest_array1[-1]) # Last element in list
@@ -978,3 +1174,314 @@ def compute_segment(ad_ref, data, xyz_pos=None):
 
     data_list = [f_current_x, f_current_y, f_pen_up]
     return move_list, data_list
+
+
+def compute_segments(ad_ref, vertices, velocities, xyz_pos):
+    """
+    Plan a polyline of straight segments, with given velocity at each vertex.
+
+    Batch version of compute_segment(): rather than building the time slices of
+    each segment one at a time, the trapezoid, triangle, linear ramp and
+    constant velocity profiles of all segments are computed together as numpy
+    arrays, and converted to SM moves in a single pass.
+
+    Inputs:
+            ad_ref: reference to an AxiDraw() object with its settings
+            vertices: Kx2 array of segment end points, in inches.
+            velocities: K + 1 velocities, at the start position and at each end point.
+            xyz_pos: A pen_handling.PenPosition object, giving the initial XYZ
+                position. It is updated to the final position.
+
+    Output: move_list, data_list, as from calling compute_segment() for each segment
+            in turn, to within rounding: The step counts of individual SM moves
+            may differ by one step, while the total steps moved are the same.
+            data_list is None if the final segment is less than one step long.
+
+    Motor step targets are measured from the starting position, so that rounding
+    does not accumulate from one segment to the next. Where a step target falls
+    close to a half step, the floating-point error of the two computations can
+    round it differently. (tests/test_motion.py compares the two planners with
+    this tolerance.) Segments where an axis
+    would move too slowly to be allowed (see compute_segment) instead defer their
+    steps to the next segment; from the first such segment onward, planning falls
+    back to compute_segment().
+    """
+
+    if len(vertices) < BATCH_MIN_SEGMENTS: # Array setup costs more than it saves
+        return _compute_segments_serial(ad_ref, vertices, velocities, xyz_pos)
+
+    f_pen_up = xyz_pos.z_up
+    x_start = xyz_pos.xpos
+    y_start = xyz_pos.ypos
+    velocities = np.asarray(velocities, dtype=float)
+
+    # check page size limits:
+    dest = np.array(vertices, dtype=float)
+    lower_bounds = np.array(ad_ref.bounds[0], dtype=float)
+    upper_bounds = np.array(ad_ref.bounds[1], dtype=float)
+    tolerance = ad_ref.params.bounds_tolerance # Truncate up to 1 step w/o error.
+    if np.any((dest < lower_bounds - tolerance) | (dest > upper_bounds + tolerance)):
+        ad_ref.warnings.add_new('bounds')
+    dest = np.clip(dest, lower_bounds, upper_bounds)
+
+    # Motor step positions of each vertex, relative to the start:
+    dest_x = dest[:, 0] - x_start
+    dest_y = dest[:, 1] - y_start
+    motor_pos1 = np.rint(ad_ref.step_scale * (dest_x + dest_y)).astype(np.int64)
+    motor_pos2 = np.rint(ad_ref.step_scale * (dest_x - dest_y)).astype(np.int64)
+    motor_steps1 = np.diff(motor_pos1, prepend=0)
+    motor_steps2 = np.diff(motor_pos2, prepend=0)
+
+    moving = (motor_steps1 != 0) | (motor_steps2 != 0) # Segments < 1 step are skipped
+    seg_index = np.flatnonzero(moving)
+    if len(seg_index) == 0:
+        return [], None
+    motor_steps1 = motor_steps1[seg_index]
+    motor_steps2 = motor_steps2[seg_index]
+    v_i = velocities[seg_index]
+    v_f = velocities[seg_index + 1]
+
+    motor_dist1_rounded = motor_steps1 / (2.0 * ad_ref.step_scale)
+    motor_dist2_rounded = motor_steps2 / (2.0 * ad_ref.step_scale)
+    delta_x_inches_rounded = motor_dist1_rounded + motor_dist2_rounded
+    delta_y_inches_rounded = motor_dist1_rounded - motor_dist2_rounded
+    segment_lengths = np.sqrt(delta_x_inches_rounded * delta_x_inches_rounded +
+        delta_y_inches_rounded * delta_y_inches_rounded)
+
+    sample_seg, durations, distances, positions = _segment_profiles(
+        ad_ref, f_pen_up, segment_lengths, v_i, v_f)
+
+    # Scale each trajectory to the "actual" travel distance, in integer motor steps:
+    fractional_distance = distances / positions[sample_seg]
+    dest_steps1 = np.rint(fractional_distance * motor_steps1[sample_seg]).astype(np.int64)
+    dest_steps2 = np.rint(fractional_distance * motor_steps2[sample_seg]).astype(np.int64)
+
+    first_sample = np.ones(len(sample_seg), dtype=bool)
+    first_sample[1:] = sample_seg[1:] != sample_seg[:-1]
+    move_steps1 = np.diff(dest_steps1, prepend=0)
+    move_steps2 = np.diff(dest_steps2, prepend=0)
+    move_times = np.diff(durations, prepend=0)
+    move_steps1[first_sample] = dest_steps1[first_sample]
+    move_steps2[first_sample] = dest_steps2[first_sample]
+    move_times[first_sample] = durations[first_sample]
+    move_times = np.maximum(move_times, 1) # don't allow zero-time moves.
+
+    # compute_segment() drops too-slow movements of an axis, and carries the lost
+    # steps over into the following move. Only that is sequential; hand it back.
+    too_slow = (((move_steps1 != 0) & (np.abs(move_steps1 / move_times) < 0.002)) |
+        ((move_steps2 != 0) & (np.abs(move_steps2 / move_times) < 0.002)))
+    if np.any(too_slow):
+        first_slow = seg_index[sample_seg[np.argmax(too_slow)]]
+        move_list, data_list = [], None
+        if first_slow > 0:
+            move_list, data_list = compute_segments(ad_ref, vertices[:first_slow],
+                velocities[:first_slow + 1], xyz_pos)
+        move_temp, data_list = _compute_segments_serial(ad_ref, vertices[first_slow:],
+            velocities[first_slow:], xyz_pos)
+        move_list.extend(move_temp)
+        return move_list, data_list
+
+    # Catch rounding errors that could cause an overspeed event:
+    max_steps = np.maximum(np.abs(move_steps1), np.abs(move_steps2))
+    move_times = np.maximum(move_times,
+        np.floor(max_steps / ad_ref.params.max_step_rate).astype(np.int64) + 1)
+
+    # If at least one motor step is required for this move, do so:
+    stepping = (move_steps1 != 0) | (move_steps2 != 0)
+    move_steps1 = move_steps1[stepping]
+    move_steps2 = move_steps2[stepping]
+    move_times = move_times[stepping]
+
+    motor_dist1_temp = move_steps1 / (ad_ref.step_scale * 2.0)
+    motor_dist2_temp = move_steps2 / (ad_ref.step_scale * 2.0)
+    x_delta = motor_dist1_temp + motor_dist2_temp # X Distance moved, inches
+    y_delta = motor_dist1_temp - motor_dist2_temp # Y Distance moved, inches
+    move_dist_inches = np.sqrt(x_delta * x_delta + y_delta * y_delta) # Total move, inches
+    # Running sums, accumulated in the same order as compute_segment()
+    f_new_x = np.cumsum(np.concatenate(([x_start], x_delta)))[1:]
+    f_new_y = np.cumsum(np.concatenate(([y_start], y_delta)))[1:]
+
+    move_list = [['SM', (steps2, steps1, move_time), [new_x, new_y, f_pen_up, dist]]
+        for steps2, steps1, move_time, new_x, new_y, dist in zip(
+            move_steps2.tolist(), move_steps1.tolist(), move_times.tolist(),
+            f_new_x.tolist(), f_new_y.tolist(), move_dist_inches.tolist())]
+
+    if move_list:
+        xyz_pos.xpos = move_list[-1][2][0]
+        xyz_pos.ypos = move_list[-1][2][1]
+    if not moving[-1]:
+        return move_list, None
+    return move_list, [xyz_pos.xpos, xyz_pos.ypos, f_pen_up]
+
+
+def _compute_segments_serial(ad_ref, vertices, velocities, xyz_pos):
+    """
+    compute_segments(), calling compute_segment() for one segment at a time.
+    """
+
+    vertices = np.asarray(vertices, dtype=float).tolist()
+    velocities = np.asarray(velocities, dtype=float).tolist()
+    move_list = []
+    data_list = None
+    for i in range(0, len(vertices)):
+
+        segment_input_data = (vertices[i][0], vertices[i][1],
+            velocities[i], velocities[i + 1], False)
+
+        move_temp, data_list = compute_segment(ad_ref, segment_input_data, xyz_pos)
+
+        if data_list is not None: # Update current position
+            xyz_pos.xpos = data_list[0]
+            xyz_pos.ypos = data_list[1]
+            xyz_pos.z_up = data_list[2]
+        if move_temp is not None:
+            move_list.extend(move_temp)
+    return move_list, data_list
+
+
+def _segment_profiles(ad_ref, f_pen_up, segment_lengths, v_i, v_f):
+    """
+    Constant velocity time slices for each segment, as in compute_segment().
+
+    Each profile is made up of phases (acceleration, cruising, deceleration, ...),
+    and each phase of one or more time slices with velocity changing in equal steps.
+    The phases of all segments are collected in arrays, then expanded into slices.
+
+    Inputs: segment lengths, initial and final velocities; arrays of equal length.
+
+    Output: sample_seg, durations, distances, positions
+            sample_seg: Index of the segment of each time slice, in ascending order.
+            durations: Elapsed time at the end of each slice, in integer milliseconds.
+            distances: Distance travelled at the end of each slice, single precision.
+            positions: Total distance travelled over each segment's slices.
+    """
+
+    if f_pen_up:
+        speed_limit = ad_ref.speed_penup # Maximum travel speeds
+        accel_rate = ad_ref.params.accel_rate_pu * ad_ref.options.accel / 100.0
+    else:
+        speed_limit = ad_ref.speed_pendown # Maximum travel speeds
+        accel_rate = ad_ref.params.accel_rate * ad_ref.options.accel / 100.0
+    time_slice = ad_ref.params.time_slice
+    cruise_interval = 20 * time_slice
+
+    v_i = np.minimum(v_i, speed_limit)
+    v_f = np.minimum(v_f, speed_limit)
+
+    t_accel_max = (speed_limit - v_i) / accel_rate
+    t_decel_max = (speed_limit - v_f) / accel_rate
+    accel_dist_max = (v_i * t_accel_max) + (0.5 * accel_rate * t_accel_max * t_accel_max)
+    decel_dist_max = (v_f * t_decel_max) + (0.5 * accel_rate * t_decel_max * t_decel_max)
+    max_vel_time_estimate = segment_lengths / speed_limit
+
+    phases = [] # (segment mask, slice count, initial velocity, velocity step, slice time)
+
+    def add_phase(mask, count, v_initial, v_step, slice_time):
+        phases.append(tuple(np.broadcast_to(value, mask.shape)[mask]
+            for value in (count, v_initial, v_step, slice_time)) + (np.flatnonzero(mask),))
+
+    constant_vel_mode = np.full(len(segment_lengths), bool(ad_ref.options.const_speed
+        and not f_pen_up))
+    v_const_initial = v_i
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        """ Case 1: 'Trapezoid' """
+        trapezoid = (~constant_vel_mode &
+            (segment_lengths > (accel_dist_max + decel_dist_max + time_slice * speed_limit)) &
+            (max_vel_time_estimate > 4 * time_slice))
+
+        intervals = np.floor(t_accel_max / time_slice).astype(np.int64)
+        velocity_step_size = (speed_limit - v_i) / (intervals + 1.0)
+        add_phase(trapezoid & (intervals > 0), intervals, v_i, velocity_step_size,
+            t_accel_max / intervals)
+        velocity = np.where(intervals > 0, v_i + intervals * velocity_step_size, v_i)
+
+        coasting_distance = segment_lengths - (accel_dist_max + decel_dist_max)
+        coasting = trapezoid & (coasting_distance > (time_slice * speed_limit))
+        cruising_time = coasting_distance / speed_limit
+        cruise_intervals = np.maximum(np.ceil(cruising_time / cruise_interval) - 1, 0)
+        add_phase(coasting, cruise_intervals.astype(np.int64), speed_limit, 0.0, cruise_interval)
+        add_phase(coasting, 1, speed_limit, 0.0,
+            cruising_time - cruise_intervals * cruise_interval)
+        velocity = np.where(coasting, speed_limit, velocity)
+
+        intervals = np.floor(t_decel_max / time_slice).astype(np.int64)
+        add_phase(trapezoid & (intervals > 0), intervals, velocity,
+            -(speed_limit - v_f) / (intervals + 1.0), t_decel_max / intervals)
+
+        """ Case 2: 'Triangle' """
+        accel_dists = accel_dist_max + decel_dist_max
+        accel_rate_local = np.where(segment_lengths >= 0.9 * accel_dists,
+            0.9 * (accel_dists / segment_lengths) * accel_rate, accel_rate)
+        accel_rate_local = np.where(accel_dists == 0, accel_rate, accel_rate_local)
+        accelerating = accel_rate_local > 0
+        ta = np.where(accelerating, (np.sqrt(2 * v_i * v_i + 2 * v_f * v_f +
+            4 * accel_rate_local * segment_lengths) - 2 * v_i) / (2 * accel_rate_local), 0)
+        vmax = v_i + accel_rate_local * ta
+
+        intervals = np.floor(ta / time_slice).astype(np.int64)
+        ta = np.where(intervals == 0, 0, ta)
+        td = np.where(accelerating, ta - (v_f - v_i) / accel_rate_local, 0)
+        d_intervals = np.floor(td / time_slice).astype(np.int64)
+
+        remaining = ~(constant_vel_mode | trapezoid)
+        triangle = remaining & (intervals + d_intervals > 4)
+        velocity_step_size = (vmax - v_i) / (intervals + 1.0)
+        add_phase(triangle & (intervals > 0), intervals, v_i, velocity_step_size,
+            ta / intervals)
+        velocity = np.where(intervals > 0, v_i + intervals * velocity_step_size, v_i)
+        add_phase(triangle & (d_intervals > 0), d_intervals, velocity,
+            -(vmax - v_f) / (d_intervals + 1.0), td / d_intervals)
+
+        """ Case 3: 'Linear or constant velocity changes' """
+        linear = remaining & ~triangle
+        v_boosted = (vmax + v_i) / 2 # Boost initial speed for this segment
+        local_accel = np.clip((v_f * v_f - v_boosted * v_boosted) / (2.0 * segment_lengths),
+            -accel_rate, accel_rate)
+        t_segment = (v_f - v_boosted) / local_accel
+        intervals = np.floor(np.where(local_accel != 0, t_segment, 0) / time_slice)
+        ramp = linear & (local_accel != 0) & (intervals > 1)
+        intervals = intervals.astype(np.int64)
+        add_phase(ramp, intervals, v_boosted, (v_f - v_boosted) / (intervals + 1.0),
+            t_segment / intervals)
+
+        # Equal velocities, or too short for a ramp: constant velocity, from the
+        # boosted or fastest initial speed respectively.
+        v_const_initial = np.where(linear & (local_accel == 0), v_boosted, v_const_initial)
+        v_const_initial = np.where(linear & (local_accel != 0) & ~ramp, vmax, v_const_initial)
+        constant_vel_mode |= linear & ~ramp
+
+    """ Case 4: 'Constant Velocity mode' """
+    if ad_ref.options.const_speed and not f_pen_up:
+        velocity = np.full(len(segment_lengths), ad_ref.speed_pendown) # Constant pen-down speed
+    else: # The faster endpoint, or a default if both endpoints are equal to zero.
+        velocity = np.where(v_f > v_const_initial, v_f, np.where(v_const_initial > 0,
+            v_const_initial, ad_ref.speed_pendown / 10))
+    add_phase(constant_vel_mode, 1, velocity, 0.0, segment_lengths / velocity)
+
+    # Order phases by segment; within a segment, they were added in time order.
+    count, v_initial, v_step, slice_time, phase_seg = (np.concatenate(values)
+        for values in zip(*phases))
+    order = np.argsort(phase_seg, kind='stable')
+    count, v_initial, v_step, slice_time, phase_seg = (count[order], v_initial[order],
+        v_step[order], slice_time[order], phase_seg[order])
+
+    # Expand phases into time slices:
+    phase_of_slice = np.repeat(np.arange(len(count)), count)
+    phase_start = np.cumsum(count) - count
+    slice_number = np.arange(len(phase_of_slice)) - phase_start[phase_of_slice] + 1
+    sample_seg = phase_seg[phase_of_slice]
+    slice_times = slice_time[phase_of_slice]
+    slice_dists = (v_initial[phase_of_slice] + slice_number * v_step[phase_of_slice]) * slice_times
+
+    # Running time and distance, restarting at each segment:
+    seg_first = np.searchsorted(sample_seg, np.arange(len(segment_lengths)))
+    seg_last = np.append(seg_first[1:], len(sample_seg)) - 1
+    time_elapsed = np.cumsum(slice_times)
+    time_elapsed -= (time_elapsed[seg_first] - slice_times[seg_first])[sample_seg]
+    position = np.cumsum(slice_dists)
+    position -= (position[seg_first] - slice_dists[seg_first])[sample_seg]
+
+    durations = np.rint(time_elapsed * 1000.0).astype(np.int64)
+    distances = position.astype(np.float32).astype(float)
+    return sample_seg, durations, distances, position[seg_last]
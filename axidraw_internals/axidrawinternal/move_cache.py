@@ -0,0 +1,97 @@
+"""
+move_cache.py
+
+Plan-once cache of the motion planned for each polyline of a document digest
+
+Part of the AxiDraw driver for Inkscape
+https://github.com/evil-mad/AxiDraw
+
+"""
+
+import hashlib
+import itertools
+from array import array
+
+
+class MoveCache:
+    """
+    MoveCache: Store the planned moves for each polyline of a DocDigest, so that
+    plotting the same digest again -- the progress bar dry run, further copies,
+    or a real plot following a preview -- replays moves rather than re-planning.
+
+    The cache is keyed on the digest contents: the vertices, their order, and the
+    layer properties. A change to any of these, such as re-optimizing for a new
+    copy with random_start, starts a new cache. Each entry also records the
+    motion settings that it was planned with and its starting position, and is
+    only reused if both match exactly.
+    """
+
+    def __init__(self):
+        self.enable = True
+        self.fingerprint = None # Digest fingerprint of the current entries
+        self.entries = {}       # (layer index, path index) -> (settings, x, y, move list)
+        self.hits = 0           # Number of polylines replayed from the cache
+        self.misses = 0         # Number of polylines planned
+
+    def clear(self):
+        """ Discard all cached moves """
+        self.fingerprint = None
+        self.entries = {}
+
+    def use_digest(self, digest):
+        """ Select the digest to plot; keep cached moves only if it is unchanged. """
+        if not self.enable:
+            return
+        fingerprint = digest_fingerprint(digest)
+        if fingerprint != self.fingerprint:
+            self.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, ad_ref, key):
+        """
+        Return the cached move list for polyline key, a (layer index, path index)
+        tuple, or None if it is not cached for the current settings and position.
+        """
+        if not self.enable or self.fingerprint is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is None or entry[:3] != (motion_settings(ad_ref),
+                ad_ref.pen.phys.xpos, ad_ref.pen.phys.ypos):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[3]
+
+    def put(self, ad_ref, key, x_start, y_start, move_list):
+        """ Store the move list planned from position (x_start, y_start) for polyline key """
+        if not self.enable or self.fingerprint is None:
+            return
+        self.entries[key] = (motion_settings(ad_ref), x_start, y_start, move_list)
+
+
+def motion_settings(ad_ref):
+    """
+    Every setting that motion planning (see motion.py) depends upon. Layer speed
+    settings are included through the pen-down speed.
+    """
+    params = ad_ref.params
+    return (ad_ref.speed_pendown, ad_ref.speed_penup, ad_ref.step_scale,
+        ad_ref.options.accel, ad_ref.options.const_speed, ad_ref.options.resolution,
+        tuple(ad_ref.bounds[0]), tuple(ad_ref.bounds[1]),
+        params.accel_rate, params.accel_rate_pu, params.cornering, params.time_slice,
+        params.max_step_rate, params.max_step_dist_lr, params.max_step_dist_hr,
+        params.bounds_tolerance)
+
+
+def digest_fingerprint(digest):
+    """ Hash of the layer properties and vertex lists of a flat DocDigest """
+    fingerprint = hashlib.blake2b(digest_size=16)
+    for layer in digest.layers:
+        props = layer.props
+        fingerprint.update(repr((props.number, props.skip, props.pause, props.delay,
+            props.speed, props.height, len(layer.paths))).encode())
+        for path_item in layer.paths:
+            vertex_list = path_item.subpaths[0]
+            fingerprint.update(len(vertex_list).to_bytes(8, 'little'))
+            fingerprint.update(array('d', itertools.chain.from_iterable(vertex_list)))
+    return fingerprint.digest()
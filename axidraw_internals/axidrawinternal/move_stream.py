@@ -0,0 +1,215 @@
+"""
+move_stream.py
+
+Compiled plots: fully planned command streams, saved to and plotted from binary files
+
+Part of the AxiDraw driver for Inkscape
+https://github.com/evil-mad/AxiDraw
+
+A move stream file holds every command that dripfeed.feed() would send while
+plotting a document: SM moves together with their position and distance data,
+pen lifts, layer delays, pen heights and pauses. Plotting from it skips SVG
+digestion, clipping, optimization and motion planning entirely.
+
+File layout, little-endian:
+    Header: MAGIC, format version, metadata length, record count (HEADER)
+    Metadata: UTF-8 JSON object; document name, model, resolution, total move time
+    Records: Array of fixed-size RECORD entries, memory-mapped on load
+
+Speeds, acceleration and resolution are baked into the SM moves when compiling.
+Pen heights and servo timing are read from the options at plot time.
+"""
+
+import copy
+import json
+import struct
+
+import numpy as np
+
+from axidrawinternal import motion
+
+MAGIC = b"AXMOVES\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sHIQ") # magic, version, metadata length, record count
+
+# Record command codes, indexing into COMMANDS:
+COMMANDS = ('SM', 'lower', 'raise', 'delay', 'height', 'pause')
+SM, LOWER, RAISE, DELAY, HEIGHT, PAUSE = range(len(COMMANDS))
+
+RECORD = np.dtype([
+    ('command', 'u1'),
+    ('pen_up', 'u1'),   # SM: final pen_up state
+    ('steps2', '<i4'),  # SM: motor 2 steps
+    ('steps1', '<i4'),  # SM: motor 1 steps
+    ('value', '<i4'),   # SM: time (ms). lower, raise: v_time (ms). delay: time (ms).
+                        # height: pen-down height. Negative values encode None.
+    ('x', '<f8'),       # SM: final x position, inches
+    ('y', '<f8'),       # SM: final y position, inches
+    ('dist', '<f8'),    # SM: distance moved, inches
+])
+
+CHUNK_SIZE = 4096 # Records converted to move lists at a time, while iterating
+
+
+class MoveStream:
+    """
+    MoveStream: A loaded move stream file. Iterating over it yields the commands
+    in the move list format used by dripfeed.feed(), converted from the
+    memory-mapped records a chunk at a time.
+    """
+
+    def __init__(self, metadata, records):
+        self.metadata = metadata    # dict; see save()
+        self.records = records      # numpy array (or memmap) of RECORD entries
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        for start in range(0, len(self.records), CHUNK_SIZE):
+            for command, pen_up, steps2, steps1, value, x_pos, y_pos, dist in \
+                    self.records[start:start + CHUNK_SIZE].tolist():
+                if command == SM:
+                    yield ['SM', (steps2, steps1, value), [x_pos, y_pos, bool(pen_up), dist]]
+                else:
+                    yield [COMMANDS[command], None if value < 0 else value]
+
+
+def plan_document(ad_ref, digest):
+    """
+    Plan every command needed to plot a document digest, in the order in which
+    AxiDraw.plot_document() would feed them, without plotting anything.
+
+    Inputs: ad_ref: reference to an AxiDraw() object with its settings, in preview
+                mode so that no commands are sent to the AxiDraw.
+            digest: Flattened path_objects.DocDigest object, ready to plot.
+
+    Output: move list, formatted as for dripfeed.feed(). In addition to the 'SM',
+            'lower' and 'raise' commands of motion.trajectory(), it includes
+            ['delay', ms], ['height', pen_pos_down or None] and ['pause', None].
+            The plot starts and ends at the parking position, with the pen up.
+    """
+
+    phys_stash = copy.copy(ad_ref.pen.phys)
+    layer_stash = (ad_ref.use_layer_speed, ad_ref.layer_speed_pendown)
+
+    ad_ref.pen.phys.xpos = ad_ref.params.start_pos_x
+    ad_ref.pen.phys.ypos = ad_ref.params.start_pos_y
+    ad_ref.pen.phys.z_up = True
+    ad_ref.use_layer_speed = False
+    ad_ref.layer_speed_pendown = -1
+    ad_ref.enable_motors()
+
+    move_list = [['raise', None]]
+    for layer in digest.layers:
+        move_list.append(['height', None])
+        move_list.append(['raise', None])
+
+        # Layer properties, as in AxiDraw.eval_layer_props():
+        props = layer.props
+        if props.pause:
+            move_list.append(['pause', None])
+        if props.delay:
+            move_list.append(['delay', props.delay])
+        if props.height is not None:
+            move_list.append(['height', props.height])
+        ad_ref.use_layer_speed = bool(props.speed)
+        ad_ref.layer_speed_pendown = props.speed if props.speed else -1
+        ad_ref.enable_motors()
+
+        for path_item in layer.paths:
+            vertex_list = path_item.subpaths[0]
+            if not vertex_list or len(vertex_list) < 2:
+                continue
+            move_list.append(['raise', None])
+            polyline_moves = ad_ref.plan_polyline(vertex_list)
+            move_list.extend(polyline_moves)
+            _follow_moves(ad_ref.pen.phys, polyline_moves)
+
+        ad_ref.use_layer_speed = False
+        ad_ref.layer_speed_pendown = -1
+        ad_ref.enable_motors()
+        move_list.append(['height', None])
+
+    move_list.append(['raise', None])
+    target_data = (ad_ref.params.start_pos_x, ad_ref.params.start_pos_y, 0, 0, False)
+    home_moves, _data = motion.compute_segment(ad_ref, target_data)
+    if home_moves:
+        move_list.extend(home_moves)
+
+    ad_ref.pen.phys = phys_stash
+    ad_ref.use_layer_speed, ad_ref.layer_speed_pendown = layer_stash
+    ad_ref.enable_motors()
+    return move_list
+
+
+def _follow_moves(phys, move_list):
+    """ Update a PenPosition to the position after executing move_list """
+    for move in move_list:
+        if move[0] == 'SM':
+            phys.xpos = move[2][0]
+            phys.ypos = move[2][1]
+        elif move[0] in ('lower', 'raise'):
+            phys.z_up = move[0] == 'raise'
+
+
+def to_records(move_list):
+    """ Convert a move list, as from plan_document(), to an array of RECORD entries """
+
+    rows = []
+    for move in move_list:
+        if move[0] == 'SM':
+            steps2, steps1, move_time = move[1]
+            x_pos, y_pos, pen_up, dist = move[2][:4]
+            rows.append((SM, pen_up, steps2, steps1, move_time, x_pos, y_pos, dist))
+        else:
+            value = -1 if move[1] is None else move[1]
+            rows.append((COMMANDS.index(move[0]), 0, 0, 0, value, 0.0, 0.0, 0.0))
+    return np.array(rows, dtype=RECORD)
+
+
+def save(file_name, move_list, name="", model=None, resolution=None):
+    """
+    Save a move list, as from plan_document(), as a move stream file.
+    model and resolution identify the AxiDraw settings that the moves were planned
+    for; plotting the file requires the same model and uses the same resolution.
+    """
+
+    records = to_records(move_list)
+    metadata = {
+        'name': name,
+        'model': model,
+        'resolution': resolution,
+        'move_time': int(records['value'][records['command'] == SM].sum()), # ms
+    }
+    metadata_bytes = json.dumps(metadata).encode('utf-8')
+    with open(file_name, 'wb') as out_file:
+        out_file.write(HEADER.pack(MAGIC, VERSION, len(metadata_bytes), len(records)))
+        out_file.write(metadata_bytes)
+        out_file.write(records.tobytes())
+
+
+def load(file_name):
+    """
+    Load a move stream file. The records are memory-mapped rather than read.
+    Raises ValueError if the file is not a valid move stream file.
+    """
+
+    with open(file_name, 'rb') as in_file:
+        header = in_file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError('Not a move stream file')
+        magic, version, metadata_length, record_count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Unsupported move stream file format, version {version}')
+        metadata = json.loads(in_file.read(metadata_length).decode('utf-8'))
+        in_file.seek(0, 2)
+        file_size = in_file.tell()
+
+    offset = HEADER.size + metadata_length
+    if file_size != offset + record_count * RECORD.itemsize:
+        raise ValueError('Truncated move stream file')
+    if record_count == 0:
+        return MoveStream(metadata, np.zeros(0, dtype=RECORD))
+    return MoveStream(metadata, np.memmap(file_name, dtype=RECORD, mode='r',
+        offset=offset, shape=(record_count,)))
@@ -207,8 +207,8 @@ class PenHandler:
         self.status.reset()
         self.heights.use_temp_pen_height = False
 
-    def pen_raise(self, ad_ref):
-        ''' Raise the pen '''
+    def pen_raise(self, ad_ref, v_time=None):
+        ''' Raise the pen; v_time optionally overrides the servo settling delay (ms) '''
 
         self.status.preview_pen_state = -1 # For preview rendering use
 
@@ -218,7 +218,8 @@ class PenHandler:
 
         self.status.lifts += 1
 
-        v_time = self.heights.times.raise_time
+        if v_time is None:
+            v_time = self.heights.times.raise_time
         if self.heights.narrow_band:
             servo_pin = ad_ref.params.nb_servo_pin
         else:
@@ -236,8 +237,8 @@ class PenHandler:
         self.phys.z_up = True
 
 
-    def pen_lower(self, ad_ref):
-        ''' Lower the pen '''
+    def pen_lower(self, ad_ref, v_time=None):
+        ''' Lower the pen; v_time optionally overrides the servo settling delay (ms) '''
 
         self.status.preview_pen_state = -1  # For preview rendering use
 
@@ -249,7 +250,8 @@ class PenHandler:
         if ad_ref.plot_status.stopped:
             return
 
-        v_time = self.heights.times.lower_time
+        if v_time is None:
+            v_time = self.heights.times.lower_time
 
         if self.heights.narrow_band:
             servo_pin = ad_ref.params.nb_servo_pin
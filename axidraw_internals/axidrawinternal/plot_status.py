@@ -87,6 +87,7 @@ class ResumeStatus:
         self.new = SVGPlotData()
         self.update_needed = False  # If true, we need to update data in the SVG file
         self.button_timestamp = 0   # Timestamp for last button check
+        self.button_pending = False # Button press already read, by a QG query
         self.reset() # Set defaults via reset function
 
     def reset(self):
@@ -95,6 +96,7 @@ class ResumeStatus:
         self.written = False    # Boolean: Data written to SVG file
         self.update_needed = False  # If true, we need to update data in the SVG file
         self.button_timestamp = time.time()   # Timestamp for last button check
+        self.button_pending = False # Button press already read, by a QG query
         self.old.reset()
         self.new.reset()
 
@@ -180,6 +182,10 @@ class ResumeStatus:
         if ad_ref.options.preview:
             return 0
 
+        if self.button_pending: # Press reported by QG, which clears the button state
+            self.button_pending = False
+            return 1
+
         time_now = time.time()
         if (time_now - self.button_timestamp) > ad_ref.params.button_interval:
             self.button_timestamp = time_now
@@ -198,6 +204,7 @@ class ResumeStatus:
         if ad_ref.options.preview:
             return
         self.button_timestamp =  time.time()
+        self.button_pending = False
         ebb_motion.QueryPRGButton(ad_ref.plot_status.port, False)
 
     def manage_offset(self, ad_ref):
@@ -518,6 +525,7 @@ class PlotStatus:
         self.port = None
         self.copies_to_plot = 1
         self.stopped = 0 # Status code. If a plot is stopped, record why.
+        self.writer = None # SerialWriter sending the moves of the current plot; see dripfeed
         for key in self.CONFIG_ITEMS: # Create instance variables in __init__
             setattr(self, key, False)
         for key in self.VERSION_ITEMS: # Create instance variables in __init__
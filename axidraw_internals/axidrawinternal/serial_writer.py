@@ -0,0 +1,142 @@
+"""
+serial_writer.py
+
+Pipelined sending of motion commands to the AxiDraw, from a background thread
+
+Part of the AxiDraw driver for Inkscape
+https://github.com/evil-mad/AxiDraw
+
+"""
+
+import collections
+import threading
+import time
+
+from axidrawinternal.plot_utils_import import from_dependency_import # plotink
+from axidrawinternal.axidraw_options import versions as ad_versions
+ebb_serial = from_dependency_import('plotink.ebb_serial')  # https://github.com/evil-mad/plotink
+
+
+class SerialWriter:
+    """
+    SerialWriter: Send pre-encoded motion commands to the EBB from a writer thread,
+    so that pause checks, progress updates and serial I/O in the main thread are
+    not tied to the time that each move takes to execute.
+
+    The main thread adds commands to a bounded queue with put(). The writer thread
+    sends each one once the motion already sent is expected to finish within the
+    lookahead time, keeping the EBB motion FIFO primed without letting it run far
+    ahead of pause requests. Expected completion times are accumulated from the
+    move times, as commands are acknowledged. Optionally, with EBB firmware 2.6.2
+    or newer, the QG query confirms when the EBB has run out of motion early.
+    QG also reports, and clears, a press of the PRG (pause) button; such a press
+    is kept in pause_pending until the main thread handles it.
+
+    Commands are removed from the queue only once sent, so that cancel() can
+    discard the commands that the EBB has not yet received.
+
+    While the writer is running, any other use of the serial port must either
+    hold port_lock, or follow drain(). One writer sends the moves of a whole plot;
+    see dripfeed.get_writer().
+    """
+
+    def __init__(self, ad_ref):
+        self.port = ad_ref.plot_status.port
+        self.lookahead = ad_ref.params.fifo_lookahead / 1000 # seconds
+        self.max_queue = ad_ref.params.fifo_queue_length
+        self.use_qg = bool(ad_ref.params.fifo_query and
+            ad_versions.min_fw_version(ad_ref.plot_status, "2.6.2"))
+
+        self.port_lock = threading.Lock()   # Held while using the serial port
+        self.cond = threading.Condition()   # Guards queue and busy_until
+        self.queue = collections.deque()    # (command, move time (ms), data) not yet sent
+        self.busy_until = time.monotonic()  # Expected time when sent motion finishes
+        self.closing = False
+        self.pause_pending = False          # PRG button press read by QG; guarded by port_lock
+
+        self.thread = threading.Thread(target=self._run, name='SerialWriter', daemon=True)
+        self.thread.start()
+
+    def put(self, command, move_time, data=None):
+        """
+        Queue command, an encoded motion command such as "SM,100,20,-20\\r" that
+        takes move_time (ms) to execute. Wait while the queue is full.
+        data is returned by cancel() if the command is discarded.
+        """
+        with self.cond:
+            while len(self.queue) >= self.max_queue and self.thread.is_alive():
+                self.cond.wait()
+            self.queue.append((command, move_time, data))
+            if len(self.queue) == 1:
+                self.cond.notify_all()
+
+    def cancel(self):
+        """
+        Discard all commands not yet sent, and return their data, oldest first.
+        Call while holding port_lock, so that no command is mid-send.
+        """
+        with self.cond:
+            dropped = [item[2] for item in self.queue]
+            self.queue.clear()
+            self.cond.notify_all()
+        return dropped
+
+    def drain(self):
+        """ Wait until all queued commands have been sent """
+        with self.cond:
+            while self.queue and self.thread.is_alive():
+                self.cond.wait()
+
+    def close(self):
+        """ Send all queued commands, then stop the writer thread """
+        self.drain()
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        """ Writer thread: Send queued commands, paced by the lookahead time """
+        while True:
+            with self.cond:
+                while not self.queue and not self.closing:
+                    self.cond.wait()
+                if not self.queue:
+                    return # Closing, with nothing left to send
+                wait_time = self.busy_until - time.monotonic() - self.lookahead
+                item = self.queue[0]
+            if wait_time > 0:
+                if not (self.use_qg and self._fifo_empty()):
+                    with self.cond:
+                        self.cond.wait(wait_time) # Wake early on cancel() or close()
+                    continue
+
+            with self.port_lock:
+                with self.cond:
+                    if not self.queue or self.queue[0] is not item:
+                        continue # Discarded by cancel()
+                # The EBB responds once the command has a place in its motion FIFO:
+                ebb_serial.command(self.port, item[0], False)
+                with self.cond:
+                    self.queue.popleft()
+                    self.busy_until = max(self.busy_until, time.monotonic()) + item[1] / 1000
+                    self.cond.notify_all()
+
+    def _fifo_empty(self):
+        """
+        Use the QG query to check whether the EBB has finished all motion sent to it.
+        If so, correct the expected completion time. Called from the writer thread.
+        Reading QG clears the PRG button state, so a press is recorded in pause_pending.
+        """
+        with self.port_lock:
+            try:
+                status = int('0x' + ebb_serial.query(self.port, 'QG\r').strip(), 16)
+            except (ValueError, AttributeError): # No response; rely upon expected times
+                return False
+            if status & 32: # PRG button pressed since the last QB or QG query
+                self.pause_pending = True
+        if status & 15: # Motion queued, executing, or motors moving
+            return False
+        with self.cond:
+            self.busy_until = time.monotonic()
+        return True
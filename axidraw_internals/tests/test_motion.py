@@ -0,0 +1,91 @@
+"""
+Compare the batched trajectory planner in motion.py with the vertex-by-vertex
+reference planner, plan_trajectory_reference(), on random paths.
+"""
+
+import random
+import types
+
+import pytest
+
+from axidrawinternal import axidraw_conf, motion, pen_handling
+
+
+def make_ad_ref(const_speed=False, resolution=1):
+    """ Just enough of an AxiDraw() object for motion planning, in preview mode """
+    options = types.SimpleNamespace(accel=axidraw_conf.accel, const_speed=const_speed,
+        resolution=resolution)
+    pen = types.SimpleNamespace(phys=pen_handling.PenPosition())
+    pen.phys.z_up = False
+    speed_limit = axidraw_conf.speed_lim_xy_hr if resolution == 1 else axidraw_conf.speed_lim_xy_lr
+    return types.SimpleNamespace(
+        params=axidraw_conf,
+        options=options,
+        pen=pen,
+        bounds=[[-1e-9, -1e-9], [11.81, 8.58]],
+        step_scale=axidraw_conf.native_res_factor * (2.0 if resolution == 1 else 1.0),
+        speed_pendown=axidraw_conf.speed_pendown * speed_limit / 110.0,
+        speed_penup=axidraw_conf.speed_penup * speed_limit / 110.0,
+        plot_status=types.SimpleNamespace(stopped=0),
+        warnings=types.SimpleNamespace(add_new=lambda name: None),
+    )
+
+
+def random_path(rng, vertex_count):
+    """ Random walk within the travel bounds, with a mix of tiny, short and long segments """
+    x_pos, y_pos = rng.uniform(1, 10), rng.uniform(1, 7)
+    vertex_list = [[x_pos, y_pos]]
+    for _ in range(vertex_count - 1):
+        step = rng.choice((1e-4, 0.002, 0.02, 0.2, 1.0)) * rng.random()
+        angle = rng.uniform(-3.1416, 3.1416)
+        x_pos = min(max(x_pos + step * rng.choice((-1, 1)) * abs(angle), 0.1), 11.7)
+        y_pos = min(max(y_pos + step * rng.choice((-1, 1)), 0.1), 8.4)
+        vertex_list.append([x_pos, y_pos])
+    return vertex_list
+
+
+def start_position(vertex_list):
+    """ Pen-down position at the start of the path; planning updates it in place """
+    position = pen_handling.PenPosition()
+    position.xpos, position.ypos, position.z_up = vertex_list[0][0], vertex_list[0][1], False
+    return position
+
+
+def assert_moves_close(ad_ref, moves, reference):
+    """
+    Same moves, with steps and times allowed to differ by rounding: one step or ms
+    per move, and positions and distances by the corresponding distance.
+    """
+    step_dist = 2 / ad_ref.step_scale # Inches; one step on each motor
+    assert len(moves) == len(reference)
+    for move, ref_move in zip(moves, reference):
+        assert move[0] == ref_move[0]
+        if move[0] != 'SM':
+            continue
+        assert all(abs(a - b) <= 1 for a, b in zip(move[1], ref_move[1]))
+        assert move[2][:2] == pytest.approx(ref_move[2][:2], abs=step_dist)
+        assert move[2][2] == ref_move[2][2]
+        assert move[2][3] == pytest.approx(ref_move[2][3], abs=step_dist)
+    # Rounding differences in one move are made up in the next; the total steps agree.
+    for index in (0, 1):
+        assert sum(m[1][index] for m in moves if m[0] == 'SM') ==\
+            sum(m[1][index] for m in reference if m[0] == 'SM')
+
+
+@pytest.mark.parametrize("const_speed", [False, True])
+@pytest.mark.parametrize("resolution", [1, 2])
+def test_batched_planner_matches_reference(monkeypatch, const_speed, resolution):
+    monkeypatch.setattr(motion, "BATCH_MIN_SEGMENTS", 0) # Batch even short paths
+    rng = random.Random(f"{const_speed}-{resolution}")
+    ad_ref = make_ad_ref(const_speed, resolution)
+    for _ in range(200):
+        vertex_list = random_path(rng, rng.randint(2, 300))
+
+        moves, data = motion.plan_trajectory(ad_ref, vertex_list, start_position(vertex_list))
+        ref_moves, ref_data = motion.plan_trajectory_reference(ad_ref, vertex_list,
+            start_position(vertex_list))
+
+        assert_moves_close(ad_ref, moves or [], ref_moves or [])
+        assert (data is None) == (ref_data is None)
+        if data is not None:
+            assert data[:3] == pytest.approx(ref_data[:3], abs=1e-6)
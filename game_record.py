@@ -0,0 +1,94 @@
+import struct
+from dataclasses import dataclass, field
+from typing import Literal
+
+MAGIC = b"KTPL"
+# version 2: buildings come from objects.skyline.generate_buildings
+# version 3: game settings that change the outcome are stored in the header
+VERSION = 3
+PREFIX = struct.Struct("<4sB")
+# magic, version, seed, number of buildings, number of players, terrain, exact collisions,
+# width, height, number of turns
+HEADER = struct.Struct("<4sBQHBB?HHI")
+# player, angle, force
+TURN = struct.Struct("<bhi")
+TERRAINS = ("objects", "heightmap")
+
+
+@dataclass(frozen=True, slots=True)
+class GameRecord:
+    seed: int
+    number_of_buildings: int = 5
+    turns: tuple[tuple[int, int, int], ...] = field(default_factory=tuple)
+    number_of_players: int = 2
+    terrain: Literal["objects", "heightmap"] = "objects"
+    exact_collisions: bool = False
+    width: int = 595
+    height: int = 375
+
+    def to_bytes(self) -> bytes:
+        data = bytearray(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.seed,
+                self.number_of_buildings,
+                self.number_of_players,
+                TERRAINS.index(self.terrain),
+                self.exact_collisions,
+                self.width,
+                self.height,
+                len(self.turns),
+            )
+        )
+        for turn in self.turns:
+            data += TURN.pack(*turn)
+
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameRecord":
+        if len(data) < PREFIX.size:
+            raise ValueError("Truncated game record: incomplete header")
+        magic, version = PREFIX.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unknown game record format {magic!r} version {version}")
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated game record: incomplete header")
+
+        (
+            _,
+            _,
+            seed,
+            number_of_buildings,
+            number_of_players,
+            terrain,
+            exact_collisions,
+            width,
+            height,
+            number_of_turns,
+        ) = HEADER.unpack_from(data)
+        if terrain >= len(TERRAINS):
+            raise ValueError(f"Unknown terrain {terrain} in game record")
+        if len(data) != HEADER.size + number_of_turns * TURN.size:
+            raise ValueError(f"Truncated game record: expected {number_of_turns} turns")
+
+        return cls(
+            seed,
+            number_of_buildings,
+            tuple(TURN.iter_unpack(data[HEADER.size:])),
+            number_of_players,
+            TERRAINS[terrain],
+            exact_collisions,
+            width,
+            height,
+        )
+
+    def save(self, file_name: str) -> None:
+        with open(file_name, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, file_name: str) -> "GameRecord":
+        with open(file_name, "rb") as file:
+            return cls.from_bytes(file.read())
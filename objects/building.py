@@ -1,7 +1,9 @@
-from output.drawable import Drawable, Rectangle, Circle
+from output.drawable import Drawable, Rectangle, Circle, Shape
 
 
 class Building(Drawable):
+    geometry = ("x_position", "height", "width")
+
     def __init__(self, x_position: int, height: int, width: int = 30) -> None:
         self.x_position = x_position
         self.height = height
@@ -16,8 +18,7 @@ class Building(Drawable):
 
         return False
 
-    @property
-    def sprite(self) -> list[Rectangle | Circle]:
+    def build_sprite(self) -> list[Shape]:
         return [
             Rectangle(
                 top_left=(self.x_position - self.width // 2, self.height),
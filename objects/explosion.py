@@ -1,8 +1,10 @@
-from output.drawable import Drawable, Rectangle, Circle
+from output.drawable import Drawable, Rectangle, Circle, Shape
 from utils.constants import BLAST_RADIUS
 
 
 class Explosion(Drawable):
+    geometry = ("x", "y")
+
     def __init__(self, x: int, y: int, radius: int) -> None:
         self.x = x
         self.y = y
@@ -14,6 +16,5 @@ class Explosion(Drawable):
 
         return False
 
-    @property
-    def sprite(self) -> list[Rectangle | Circle]:
+    def build_sprite(self) -> list[Shape]:
         return [Circle(center=(self.x, self.y), radius=BLAST_RADIUS)]
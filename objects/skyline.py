@@ -0,0 +1,73 @@
+import bisect
+import itertools
+import math
+import random
+from typing import Iterable
+
+from objects.building import Building
+
+
+def free_intervals(
+    low: int, high: int, buildings: Iterable[Building], building_width: int, min_distance: int
+) -> list[tuple[int, int]]:
+    # inclusive ranges of x positions where a new building keeps min_distance to every existing one
+    blocked = []
+    for building in buildings:
+        reach = math.ceil((building_width + building.width) / 2 + min_distance)
+        blocked.append((building.x_position - reach + 1, building.x_position + reach - 1))
+    blocked.sort()
+
+    intervals = []
+    start = low
+    for blocked_start, blocked_end in blocked:
+        if blocked_start > start:
+            intervals.append((start, min(blocked_start - 1, high)))
+        start = max(start, blocked_end + 1)
+        if start > high:
+            break
+    else:
+        intervals.append((start, high))
+
+    return [(start, end) for start, end in intervals if start <= end]
+
+
+def generate_buildings(
+    number_of_buildings: int,
+    width: int,
+    height: int,
+    seed: int | random.Random | None = None,
+    existing: Iterable[Building] = (),
+    building_width: int = 30,
+    min_distance: int = 10,
+    margin: int = 50,
+    min_height: int = 30,
+) -> list[Building]:
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    spacing = building_width + min_distance
+    intervals = free_intervals(margin, width - margin, existing, building_width, min_distance)
+
+    # every interval holds at most this many buildings at minimum spacing
+    capacities = [(end - start) // spacing + 1 for start, end in intervals]
+    total_capacity = sum(capacities)
+    if number_of_buildings > total_capacity:
+        raise ValueError(
+            f"Cannot place {number_of_buildings} buildings, only {total_capacity} fit into the free space"
+        )
+
+    # distribute the buildings over the intervals without exceeding any capacity
+    bounds = list(itertools.accumulate(capacities))
+    counts = [0] * len(intervals)
+    for slot in rng.sample(range(total_capacity), number_of_buildings):
+        counts[bisect.bisect_right(bounds, slot)] += 1
+
+    buildings = []
+    for (start, end), count in zip(intervals, counts):
+        # sweep left to right: sorted offsets into the slack, each building pushed one spacing further
+        slack = end - start - (count - 1) * spacing
+        offsets = sorted(rng.randint(0, slack) for _ in range(count))
+        for i, offset in enumerate(offsets):
+            buildings.append(
+                Building(start + offset + i * spacing, rng.randint(min_height, height - 10), building_width)
+            )
+
+    return buildings
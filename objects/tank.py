@@ -1,34 +1,41 @@
-import math
 from functools import cached_property
-from typing import Literal, Generator
+from typing import Literal
 
-from output.drawable import Drawable, Rectangle, Circle
+import numpy as np
+import numpy.typing as npt
+
+from output.drawable import Drawable, Rectangle, Circle, Shape
+from physics.trajectory import compute_trajectories
 from utils.constants import HIT_RADIUS
-from utils.units import GRAVITATIONAL_CONSTANT
 
 
 class Tank(Drawable):
+    geometry = ("x_position", "y_position")
+
     def __init__(self, x_position: int, y_position: int) -> None:
         self.x_position = x_position
         self.y_position = y_position
 
-    def shoot(self, angle: int, velocity: int) -> Generator[None, None, None]:
-        angle_ = self.direction * angle * math.pi / 180
-        for i in range(HIT_RADIUS + 2, 1000):
-            x_i = self.direction * i + self.x_position
-            y_i = (
-                -GRAVITATIONAL_CONSTANT
-                * i**2
-                / (2 * velocity * math.cos(angle_) ** 2)
-                + i * math.tan(angle_ * self.direction)
-                + self.y_position
-            )
-
-            yield x_i, y_i
+    def shoot(
+        self, angle: int, velocity: int, width: int, direction: Literal[1, -1] | None = None
+    ) -> np.ndarray:
+        trajectory, length = self.trajectories(angle, velocity, width, direction)
+        return trajectory[:length]
+
+    def trajectories(
+        self,
+        angles: npt.ArrayLike,
+        velocities: npt.ArrayLike,
+        width: int,
+        direction: Literal[1, -1] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # direction overrides the side the tank fires to by default
+        return compute_trajectories(
+            self.x_position, self.y_position, direction or self.direction, angles, velocities, width
+        )
 
     def is_hit(self, x: int, y: int) -> bool:
         if abs(x - self.x_position) + abs(y - self.y_position) < HIT_RADIUS:
-            print(f"Player {-self.direction} wins!")
             return True
 
         return False
@@ -40,8 +47,7 @@ class Tank(Drawable):
         else:
             return -1
 
-    @property
-    def sprite(self) -> list[Rectangle | Circle]:
+    def build_sprite(self) -> list[Shape]:
         return [
             Rectangle(
                 top_left=(self.x_position - HIT_RADIUS, self.y_position - HIT_RADIUS),
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Sequence
+
+from output.drawable import Rectangle, Circle, Shape
+from output.output_device import OutputDevice
+
+
+class AsyncOutputDevice(OutputDevice):
+    def __init__(self, device: OutputDevice, max_pending: int = 64) -> None:
+        self.device = device
+
+        self._commands: queue.Queue[tuple[float, Callable[..., Any], tuple] | None] = queue.Queue(max_pending)
+        self._error: Exception | None = None
+        self._oldest_submitted: float | None = None
+        self._worker = threading.Thread(
+            target=self._run, name=f"{type(device).__name__}-worker", daemon=True
+        )
+        self._worker.start()
+
+    def draw_rectangle(
+        self, top_left: tuple[int, int], bottom_right: tuple[int, int]
+    ) -> None:
+        self._submit(self.device.draw_rectangle, top_left, bottom_right)
+
+    def draw_circle(self, center: tuple[int, int], radius: int) -> None:
+        self._submit(self.device.draw_circle, center, radius)
+
+    def draw_path(self, path: list[tuple[int, int]]) -> None:
+        self._submit(self.device.draw_path, list(path))
+
+    def draw_line(
+        self, first_point: tuple[int, int], second_point: tuple[int, int]
+    ) -> None:
+        self._submit(self.device.draw_line, first_point, second_point)
+
+    def draw_sprite(self, sprite: Sequence[Shape]) -> None:
+        self._submit(self.device.draw_sprite, tuple(sprite))
+
+    def draw_sprites(self, sprites: Iterable[Sequence[Shape]]) -> None:
+        self._submit(self.device.draw_sprites, [tuple(sprite) for sprite in sprites])
+
+    def draw_rectangles(self, rectangles: Sequence[Rectangle]) -> None:
+        self._submit(self.device.draw_rectangles, tuple(rectangles))
+
+    def draw_circles(self, circles: Sequence[Circle]) -> None:
+        self._submit(self.device.draw_circles, tuple(circles))
+
+    def flush(self) -> None:
+        self._submit(self.device.flush)
+
+    def wait_idle(self) -> None:
+        self._commands.join()
+        self._raise_error()
+
+    @property
+    def pending(self) -> int:
+        return self._commands.unfinished_tasks
+
+    @property
+    def lag(self) -> float:
+        # seconds the device is behind the game: age of the oldest command not yet drawn
+        oldest_submitted = self._oldest_submitted
+        return 0.0 if oldest_submitted is None else time.monotonic() - oldest_submitted
+
+    def close(self) -> None:
+        self.wait_idle()
+        self._commands.put(None)
+        self._worker.join()
+
+    def _submit(self, command: Callable[..., Any], *args: Any) -> None:
+        self._raise_error()
+        # blocks while max_pending commands are queued, so a slow device throttles the game
+        self._commands.put((time.monotonic(), command, args))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            item = self._commands.get()
+            try:
+                if item is None:
+                    return
+                submitted, command, args = item
+                self._oldest_submitted = submitted
+                # after a failure, drop the backlog until the game has seen the error
+                if self._error is None:
+                    command(*args)
+            except Exception as error:
+                self._error = error
+            finally:
+                if self._commands.empty():
+                    self._oldest_submitted = None
+                self._commands.task_done()
@@ -1,72 +1,80 @@
 import math
+from itertools import accumulate
 
+from axidrawinternal import dripfeed, motion, path_objects
 from pyaxidraw.axidraw import AxiDraw
 
+from output.digest_device import DASH_VERTICES, DigestOutputDevice
 from output.output_device import OutputDevice
-from utils.units import PX_TO_INCH, ANGLE_TO_RADIANS
 
 
 class AxidrawPlotter(OutputDevice):
-    def __init__(self, output: AxiDraw, width: int, height: int) -> None:
+    def __init__(
+        self, output: AxiDraw, width: int, height: int, buffered: bool = False
+    ) -> None:
         self.output = output
         self.width = width
         self.height = height
+        self.buffered = buffered
+
+        self._digest_device = DigestOutputDevice(width, height, min_gap=output.params.min_gap)
+        self._dashed_paths: list[list[list[float]]] = []
 
     def draw_rectangle(
         self, top_left: tuple[int, int], bottom_right: tuple[int, int]
     ) -> None:
-        top_left_ = (top_left[0] * PX_TO_INCH, (self.height - top_left[1]) * PX_TO_INCH)
-        bottom_right_ = (bottom_right[0] * PX_TO_INCH, (self.height - bottom_right[1]) * PX_TO_INCH)
+        if self.buffered:
+            self._digest_device.draw_rectangle(top_left, bottom_right)
+            return
 
+        top_left_, *corners = self._digest_device.rectangle_polyline(top_left, bottom_right)
         self.output.goto(*top_left_)
         self.output.pendown()
-        self.output.lineto(top_left_[0], bottom_right_[1])
-        self.output.lineto(*bottom_right_)
-        self.output.lineto(bottom_right_[0], top_left_[1])
-        self.output.lineto(*top_left_)
+        for corner in corners:
+            self.output.lineto(*corner)
         self.output.penup()
         self.output.goto(0, 0)
 
     def draw_circle(self, center: tuple[int, int], radius: int) -> None:
-        circle_points = []
-        for phi in range(0, 360, 20):
-            x, y = (
-                radius * math.sin(phi * ANGLE_TO_RADIANS) + center[0],
-                radius * math.cos(phi * ANGLE_TO_RADIANS) + (self.height - center[1]),
-            )
-            if 0 < x < self.width and 0 < y < self.height:
-                circle_points.append((x * PX_TO_INCH, y * PX_TO_INCH))
-
-        self.output.goto(*circle_points[0])
-        self.output.pendown()
+        if self.buffered:
+            self._digest_device.draw_circle(center, radius)
+            return
 
-        for point in circle_points:
-            self.output.lineto(*point)
+        circle_points = self._digest_device.circle_polyline(center, radius)
+        if not circle_points:
+            return
 
-        self.output.lineto(*circle_points[0])
-        self.output.penup()
+        self.output.plot_polyline(circle_points)
         self.output.goto(0, 0)
 
     def draw_path(self, path: list[tuple[int, int]]) -> None:
-        path_ = [(point[0] * PX_TO_INCH, (self.height - point[1]) * PX_TO_INCH) for point in path]
-        self.output.goto(*path_[0])
+        path_ = self._digest_device.path_polyline(path)
+        if len(path_) < 2:
+            return
 
-        for i in range(0, len(path_), 20):
-            try:
-                self.output.pendown()
-                self.output.goto(*path_[i])
+        if self.buffered:
+            self._dashed_paths.append(path_)
+            return
 
-                self.output.penup()
-                self.output.goto(*path_[i+10])
-            except IndexError:
-                break
-
-        self.output.penup()
+        self._plot_dashed(path_)
         self.output.goto(0, 0)
 
+    def _plot_dashed(self, path_: list[list[float]]) -> None:
+        self.output.goto(*path_[0])
+
+        # one trajectory for the whole arc; the pen toggles every DASH_VERTICES vertices without stopping
+        arc_length = list(accumulate((math.dist(*segment) for segment in zip(path_, path_[1:])), initial=0))
+        trajectory = motion.dashed_trajectory(self.output, path_, arc_length[DASH_VERTICES::DASH_VERTICES])
+        if trajectory is not None:
+            dripfeed.feed(self.output, trajectory[0])
+
     def draw_line(
         self, first_point: tuple[int, int], second_point: tuple[int, int]
     ) -> None:
+        if self.buffered:
+            self._digest_device.draw_line(first_point, second_point)
+            return
+
         first_point_ = (first_point[0], self.height - first_point[1])
         second_point_ = (second_point[0], self.height - second_point[1])
 
@@ -77,3 +85,23 @@ class AxidrawPlotter(OutputDevice):
         self.output.penup()
 
         self.output.goto(0, 0)
+
+    def flush(self) -> None:
+        if not self._digest_device.polylines and not self._dashed_paths:
+            return
+
+        for path_ in self._dashed_paths:
+            self._plot_dashed(path_)
+        self._dashed_paths = []
+
+        if self._digest_device.polylines:
+            digest = self.digest()
+            self._digest_device.clear()
+
+            for path in digest.layers[0].paths:
+                self.output.draw_path(path.subpaths[0])
+        # park at the end of the last polyline; the next turn starts from here, not from home
+        self.output.penup()
+
+    def digest(self) -> path_objects.DocDigest:
+        return self._digest_device.digest()
@@ -0,0 +1,129 @@
+import math
+from functools import cache
+
+from axidrawinternal import axidraw_conf, path_objects, plot_optimizations
+from lxml import etree
+
+from output.output_device import OutputDevice
+from utils.units import PX_TO_INCH
+
+DASH_VERTICES = 10
+PEN_WIDTH = 0.02  # inch
+# a chord may sag at most this far inside the true circle before the facets become visible
+CHORD_TOLERANCE = PEN_WIDTH / 4
+
+
+class DigestOutputDevice(OutputDevice):
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        min_gap: float = axidraw_conf.min_gap,
+        model: int = axidraw_conf.model,
+        name: str = "katapult",
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.min_gap = min_gap
+        self.model = model
+        self.name = name
+
+        self.polylines: list[list[list[float]]] = []
+
+    def draw_rectangle(
+        self, top_left: tuple[int, int], bottom_right: tuple[int, int]
+    ) -> None:
+        self.polylines.append(self.rectangle_polyline(top_left, bottom_right))
+
+    def draw_circle(self, center: tuple[int, int], radius: int) -> None:
+        circle_points = self.circle_polyline(center, radius)
+        if circle_points:
+            self.polylines.append(circle_points)
+
+    def draw_path(self, path: list[tuple[int, int]]) -> None:
+        path_ = self.path_polyline(path)
+        for i in range(0, len(path_) - DASH_VERTICES, 2 * DASH_VERTICES):
+            self.polylines.append(path_[i: i + DASH_VERTICES + 1])
+
+    def draw_line(
+        self, first_point: tuple[int, int], second_point: tuple[int, int]
+    ) -> None:
+        self.polylines.append(self.path_polyline([first_point, second_point]))
+
+    def clear(self) -> None:
+        self.polylines = []
+
+    def digest(self, optimize: bool = True) -> path_objects.DocDigest:
+        layer = path_objects.LayerItem.from_attrs(
+            name="KAtapult",
+            item_id="katapult",
+            paths=[
+                path_objects.PathItem.from_attrs(subpaths=[polyline], item_id=f"primitive_{i}")
+                for i, polyline in enumerate(self.polylines)
+            ],
+        )
+
+        digest = path_objects.DocDigest()
+        digest.name = self.name
+        digest.width = self.width * PX_TO_INCH
+        digest.height = self.height * PX_TO_INCH
+        digest.viewbox = f"0 0 {digest.width:f} {digest.height:f}"
+        digest.plotdata["model"] = self.model
+        digest.layers = [layer]
+        digest.flat = True
+
+        if optimize:
+            plot_optimizations.connect_nearby_ends(digest, True, self.min_gap)
+            plot_optimizations.reorder(digest, True)
+
+        return digest
+
+    def to_plob(self, optimize: bool = True) -> etree._Element:
+        return self.digest(optimize).to_plob()
+
+    def write_plob(self, file_name: str, optimize: bool = True) -> None:
+        etree.ElementTree(self.to_plob(optimize)).write(file_name, xml_declaration=True, encoding="UTF-8")
+
+    def to_inch(self, point: tuple[float, float]) -> list[float]:
+        return [point[0] * PX_TO_INCH, (self.height - point[1]) * PX_TO_INCH]
+
+    def rectangle_polyline(
+        self, top_left: tuple[int, int], bottom_right: tuple[int, int]
+    ) -> list[list[float]]:
+        top_left_ = self.to_inch(top_left)
+        bottom_right_ = self.to_inch(bottom_right)
+
+        return [
+            [*top_left_],
+            [top_left_[0], bottom_right_[1]],
+            [*bottom_right_],
+            [bottom_right_[0], top_left_[1]],
+            [*top_left_],
+        ]
+
+    def circle_polyline(self, center: tuple[int, int], radius: int) -> list[list[float]]:
+        center_ = self.to_inch(center)
+        circle_points = [
+            [x, y]
+            for x, y in ((center_[0] + dx, center_[1] + dy) for dx, dy in _circle_template(radius * PX_TO_INCH))
+            if 0 < x < self.width * PX_TO_INCH and 0 < y < self.height * PX_TO_INCH
+        ]
+        if circle_points:
+            circle_points.append([*circle_points[0]])
+
+        return circle_points
+
+    def path_polyline(self, path: list[tuple[int, int]]) -> list[list[float]]:
+        return [self.to_inch(point) for point in path]
+
+
+@cache
+def _circle_template(radius: float) -> tuple[tuple[float, float], ...]:
+    # sagitta r * (1 - cos(step / 2)) <= CHORD_TOLERANCE
+    step = 2 * math.acos(max(1 - CHORD_TOLERANCE / radius, -1)) if radius > 0 else 2 * math.pi
+    vertices = max(math.ceil(2 * math.pi / step), 8)
+
+    return tuple(
+        (radius * math.sin(2 * math.pi * i / vertices), radius * math.cos(2 * math.pi * i / vertices))
+        for i in range(vertices)
+    )
@@ -1,21 +1,40 @@
 from abc import abstractmethod
 from dataclasses import dataclass
+from typing import Any, Sequence
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Circle:
     center: tuple[int, int]
     radius: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Rectangle:
     top_left: tuple[int, int]
     bottom_right: tuple[int, int]
 
 
+Shape = Rectangle | Circle
+
+
 class Drawable:
+    # attributes the sprite is built from; assigning one of them drops the cached sprite
+    geometry: tuple[str, ...] = ()
+
     @property
+    def sprite(self) -> Sequence[Shape]:
+        sprite = self.__dict__.get("_sprite")
+        if sprite is None:
+            sprite = self.__dict__["_sprite"] = tuple(self.build_sprite())
+
+        return sprite
+
     @abstractmethod
-    def sprite(self) -> list[Rectangle | Circle]:
+    def build_sprite(self) -> Sequence[Shape]:
         ...
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.geometry:
+            self.__dict__.pop("_sprite", None)
+        super().__setattr__(name, value)
@@ -0,0 +1,67 @@
+from typing import Iterable, Sequence
+
+from output.async_device import AsyncOutputDevice
+from output.drawable import Rectangle, Circle, Shape
+from output.output_device import OutputDevice
+
+
+class FanOutOutputDevice(OutputDevice):
+    def __init__(self, devices: Sequence[OutputDevice], max_pending: int = 1024) -> None:
+        # one worker per backend, so the screen never waits for the plotter;
+        # main-thread-only backends like the screen draw directly on the caller's thread
+        self.devices = [
+            device if device.main_thread_only else AsyncOutputDevice(device, max_pending) for device in devices
+        ]
+
+    def draw_rectangle(
+        self, top_left: tuple[int, int], bottom_right: tuple[int, int]
+    ) -> None:
+        for device in self.devices:
+            device.draw_rectangle(top_left, bottom_right)
+
+    def draw_circle(self, center: tuple[int, int], radius: int) -> None:
+        for device in self.devices:
+            device.draw_circle(center, radius)
+
+    def draw_path(self, path: list[tuple[int, int]]) -> None:
+        for device in self.devices:
+            device.draw_path(path)
+
+    def draw_line(
+        self, first_point: tuple[int, int], second_point: tuple[int, int]
+    ) -> None:
+        for device in self.devices:
+            device.draw_line(first_point, second_point)
+
+    def draw_sprite(self, sprite: Sequence[Shape]) -> None:
+        for device in self.devices:
+            device.draw_sprite(sprite)
+
+    def draw_sprites(self, sprites: Iterable[Sequence[Shape]]) -> None:
+        sprites = [tuple(sprite) for sprite in sprites]
+        for device in self.devices:
+            device.draw_sprites(sprites)
+
+    def draw_rectangles(self, rectangles: Sequence[Rectangle]) -> None:
+        for device in self.devices:
+            device.draw_rectangles(rectangles)
+
+    def draw_circles(self, circles: Sequence[Circle]) -> None:
+        for device in self.devices:
+            device.draw_circles(circles)
+
+    def flush(self) -> None:
+        for device in self.devices:
+            device.flush()
+
+    def wait_idle(self) -> None:
+        for device in self.devices:
+            device.wait_idle()
+
+    def close(self) -> None:
+        for device in self.devices:
+            if isinstance(device, AsyncOutputDevice):
+                device.close()
+
+    def lags(self) -> list[float]:
+        return [device.lag if isinstance(device, AsyncOutputDevice) else 0.0 for device in self.devices]
@@ -0,0 +1,19 @@
+from output.output_device import OutputDevice
+
+
+class NullOutputDevice(OutputDevice):
+    def draw_rectangle(
+        self, top_left: tuple[int, int], bottom_right: tuple[int, int]
+    ) -> None:
+        pass
+
+    def draw_circle(self, center: tuple[int, int], radius: int) -> None:
+        pass
+
+    def draw_path(self, path: list[tuple[int, int]]) -> None:
+        pass
+
+    def draw_line(
+        self, first_point: tuple[int, int], second_point: tuple[int, int]
+    ) -> None:
+        pass
@@ -1,9 +1,13 @@
 from abc import ABCMeta, abstractmethod
+from typing import Iterable, Sequence
 
-from output.drawable import Rectangle, Circle
+from output.drawable import Rectangle, Circle, Shape
 
 
 class OutputDevice(metaclass=ABCMeta):
+    # devices whose calls must stay on the thread that created them, e.g. GUI windows
+    main_thread_only = False
+
     @abstractmethod
     def draw_rectangle(
         self, top_left: tuple[int, int], bottom_right: tuple[int, int]
@@ -23,11 +27,33 @@ class OutputDevice(metaclass=ABCMeta):
     ) -> None:
         ...
 
-    def draw_sprite(self, sprite: list[Rectangle | Circle]) -> None:
-        for shape in sprite:
-            if isinstance(shape, Rectangle):
-                self.draw_rectangle(shape.top_left, shape.bottom_right)
-            elif isinstance(shape, Circle):
-                self.draw_circle(shape.center, shape.radius)
-            else:
-                raise ValueError(f"Unknown shape {shape}")
+    def flush(self) -> None:
+        ...
+
+    def wait_idle(self) -> None:
+        ...
+
+    def draw_sprite(self, sprite: Sequence[Shape]) -> None:
+        self.draw_sprites((sprite,))
+
+    def draw_sprites(self, sprites: Iterable[Sequence[Shape]]) -> None:
+        shapes: dict[type, list] = {Rectangle: [], Circle: []}
+        for sprite in sprites:
+            for shape in sprite:
+                try:
+                    shapes[type(shape)].append(shape)
+                except KeyError:
+                    raise ValueError(f"Unknown shape {shape}") from None
+
+        if shapes[Rectangle]:
+            self.draw_rectangles(shapes[Rectangle])
+        if shapes[Circle]:
+            self.draw_circles(shapes[Circle])
+
+    def draw_rectangles(self, rectangles: Sequence[Rectangle]) -> None:
+        for rectangle in rectangles:
+            self.draw_rectangle(rectangle.top_left, rectangle.bottom_right)
+
+    def draw_circles(self, circles: Sequence[Circle]) -> None:
+        for circle in circles:
+            self.draw_circle(circle.center, circle.radius)
@@ -0,0 +1,33 @@
+import sys
+from importlib import import_module
+from typing import Any
+
+from output.output_device import OutputDevice
+
+# backend name -> "module:class"; a backend module is imported only when it is selected
+OUTPUT_BACKENDS: dict[str, str] = {
+    "screen": "output.screen_plotter:ScreenPlotter",
+    "axidraw": "output.axidraw_plotter:AxidrawPlotter",
+    "digest": "output.digest_device:DigestOutputDevice",
+    "null": "output.null_device:NullOutputDevice",
+}
+
+
+def register_backend(name: str, target: str) -> None:
+    OUTPUT_BACKENDS[name] = target
+
+
+def create_output_device(name: str, *args: Any, **kwargs: Any) -> OutputDevice:
+    try:
+        target = OUTPUT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output backend {name}") from None
+
+    module_name, _, class_name = target.partition(":")
+    return getattr(import_module(module_name), class_name)(*args, **kwargs)
+
+
+def is_axidraw(output: Any) -> bool:
+    # an AxiDraw instance means pyaxidraw is already loaded; never import it just to check
+    axidraw = sys.modules.get("pyaxidraw.axidraw")
+    return axidraw is not None and isinstance(output, axidraw.AxiDraw)
@@ -1,66 +1,105 @@
+import time
+from typing import Sequence
+
 import cv2
 import numpy as np
 
+from output.drawable import Rectangle, Circle
 from output.output_device import OutputDevice
 
 
 class ScreenPlotter(OutputDevice):
-    def __init__(self, screen: np.array, width: int, height: int) -> None:
+    # some platforms require cv2.imshow/waitKey on the main thread
+    main_thread_only = True
+
+    def __init__(
+        self, screen: np.array, width: int, height: int, max_fps: float | None = None
+    ) -> None:
         self.screen = screen
         self.width = width
         self.height = height
+        self.max_fps = max_fps
+
+        self._closed_polylines: list[np.ndarray] = []
+        self._open_polylines: list[np.ndarray] = []
+        self._last_frame = 0.0
 
         self._init_screen()
 
     def draw_rectangle(
         self, top_left: tuple[int, int], bottom_right: tuple[int, int]
     ) -> None:
-        self.screen = cv2.rectangle(
-            self.screen,
-            (top_left[0], self.height - top_left[1]),
-            (bottom_right[0], self.height - bottom_right[1]),
-            [0],
-            4,
+        self._closed_polylines.append(
+            self._to_screen(
+                [
+                    top_left,
+                    (top_left[0], bottom_right[1]),
+                    bottom_right,
+                    (bottom_right[0], top_left[1]),
+                ]
+            )
         )
-        cv2.imshow("KAtapult", self.screen)
-        cv2.waitKey(1)
+        self._request_frame()
 
     def draw_circle(self, center: tuple[int, int], radius: int) -> None:
-        self.screen = cv2.circle(
-            self.screen, (center[0], self.height - center[1]), radius, [0], 4
+        self._closed_polylines.append(
+            cv2.ellipse2Poly(
+                (int(center[0]), int(self.height - center[1])), (int(radius), int(radius)), 0, 0, 360, 5
+            )
         )
-        cv2.imshow("KAtapult", self.screen)
-        cv2.waitKey(1)
+        self._request_frame()
+
+    def draw_rectangles(self, rectangles: Sequence[Rectangle]) -> None:
+        corners = np.array(
+            [(*rectangle.top_left, *rectangle.bottom_right) for rectangle in rectangles], dtype=np.int32
+        ).reshape(-1, 4)
+        # (N, 4, 2) quads in the corner order of draw_rectangle
+        quads = corners[:, [[0, 1], [0, 3], [2, 3], [2, 1]]]
+        quads[..., 1] = self.height - quads[..., 1]
+        self._closed_polylines.extend(quads)
+        self._request_frame()
+
+    def draw_circles(self, circles: Sequence[Circle]) -> None:
+        for circle in circles:
+            self._closed_polylines.append(
+                cv2.ellipse2Poly(
+                    (int(circle.center[0]), int(self.height - circle.center[1])),
+                    (int(circle.radius), int(circle.radius)),
+                    0, 0, 360, 5,
+                )
+            )
+        self._request_frame()
 
     def draw_line (self, first_point: tuple[int,int], second_point: tuple[int,int]) -> None:
-        self.screen = cv2.line(
-            self.screen,
-            (second_point[0], self.height - second_point[1]),
-            (first_point[0], self.height - first_point[1]),
-            [0],
-            4,
-        )
-        cv2.imshow("KAtapult", self.screen)
-        cv2.waitKey(1)
+        self._open_polylines.append(self._to_screen([second_point, first_point]))
+        self._request_frame()
 
     def draw_path(self, path: list[tuple[int, int]]) -> None:
-        for i in range(0, len(path), 20):
-            try:
-                point_a = path[i]
-                point_b = path[i + 10]
-            except IndexError:
-                break
-
-            self.screen = cv2.line(
-                self.screen,
-                (point_a[0], self.height - point_a[1]),
-                (point_b[0], self.height - point_b[1]),
-                [0],
-                4,
-            )
+        points = self._to_screen(path)
+        dashes = np.arange(0, len(points) - 10, 20)
+        self._open_polylines.extend(np.stack((points[dashes], points[dashes + 10]), axis=1))
+        self._request_frame()
+
+    def flush(self) -> None:
+        if self._closed_polylines:
+            cv2.polylines(self.screen, self._closed_polylines, True, [0], 4)
+        if self._open_polylines:
+            cv2.polylines(self.screen, self._open_polylines, False, [0], 4)
+        self._closed_polylines.clear()
+        self._open_polylines.clear()
 
         cv2.imshow("KAtapult", self.screen)
         cv2.waitKey(1)
+        self._last_frame = time.perf_counter()
+
+    def _request_frame(self) -> None:
+        if self.max_fps is None or time.perf_counter() - self._last_frame >= 1 / self.max_fps:
+            self.flush()
+
+    def _to_screen(self, points: list[tuple[int, int]]) -> np.ndarray:
+        points_ = np.array(points, dtype=np.int32).reshape(-1, 2)
+        points_[:, 1] = self.height - points_[:, 1]
+        return points_
 
     def _init_screen(self):
         self.screen.fill(255)
@@ -0,0 +1,117 @@
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from objects.tank import Tank
+from physics.collision_index import CollisionIndex
+
+
+@dataclass(frozen=True)
+class Aim:
+    angle: int
+    force: int
+    miss_distance: float
+
+    @property
+    def hits_target(self) -> bool:
+        return self.miss_distance == 0
+
+
+class AimSolver:
+    def __init__(
+        self,
+        angles: range = range(0, 90, 3),
+        forces: range = range(20, 3020, 40),
+        time_budget: float = 1.0,
+        batch_size: int = 512,
+    ) -> None:
+        self.angles = angles
+        self.forces = forces
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+
+    def solve(
+        self,
+        shooter: Tank,
+        target: Tank,
+        collision_index: CollisionIndex,
+        width: int,
+        direction: Literal[1, -1] | None = None,
+    ) -> Aim:
+        deadline = time.perf_counter() + self.time_budget
+        angle_grid, force_grid = np.meshgrid(np.array(self.angles), np.array(self.forces), indexing="ij")
+        # visit the grid in a fixed shuffled order so a cut-off search still covers all of it
+        order = np.random.default_rng(0).permutation(angle_grid.size)
+        angles, forces = angle_grid.ravel()[order], force_grid.ravel()[order]
+
+        scores = np.full(angles.size, np.inf)
+        for start in range(0, angles.size, self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            scores[batch] = self._score(
+                shooter, target, collision_index, width, angles[batch], forces[batch], direction
+            )
+            if time.perf_counter() > deadline or scores[batch].min() == 0:
+                break
+
+        best = int(scores.argmin())
+        angle, force, score = int(angles[best]), int(forces[best]), float(scores[best])
+
+        angle_step, force_step = self.angles.step, self.forces.step
+        while score > 0 and (angle_step > 1 or force_step > 1) and time.perf_counter() < deadline:
+            angle_step, force_step = max(angle_step // 2, 1), max(force_step // 2, 1)
+            improved = True
+            while improved and score > 0 and time.perf_counter() < deadline:
+                offsets = np.array(
+                    [(da, df) for da in (-1, 0, 1) for df in (-1, 0, 1) if da or df]
+                ) * (angle_step, force_step)
+                neighbour_angles = angle + offsets[:, 0]
+                neighbour_forces = force + offsets[:, 1]
+                valid = neighbour_forces > 0
+                neighbour_scores = np.full(len(offsets), np.inf)
+                neighbour_scores[valid] = self._score(
+                    shooter,
+                    target,
+                    collision_index,
+                    width,
+                    neighbour_angles[valid],
+                    neighbour_forces[valid],
+                    direction,
+                )
+
+                candidate = int(neighbour_scores.argmin())
+                improved = neighbour_scores[candidate] < score
+                if improved:
+                    angle = int(neighbour_angles[candidate])
+                    force = int(neighbour_forces[candidate])
+                    score = float(neighbour_scores[candidate])
+
+        return Aim(angle, force, score)
+
+    @staticmethod
+    def _score(
+        shooter: Tank,
+        target: Tank,
+        collision_index: CollisionIndex,
+        width: int,
+        angles: np.ndarray,
+        forces: np.ndarray,
+        direction: Literal[1, -1] | None = None,
+    ) -> np.ndarray:
+        trajectories, lengths = shooter.trajectories(angles, forces * 10, width, direction)
+        with np.errstate(invalid="ignore"):
+            trajectories = trajectories.astype(np.int64)
+        first, hit_tank = collision_index.first_hits(trajectories, lengths)
+
+        rows = np.arange(len(angles))
+        ends = trajectories[rows, np.where(first >= 0, first, lengths - 1)]
+        scores = (
+            np.abs(ends[:, 0] - target.x_position) + np.abs(ends[:, 1] - target.y_position)
+        ).astype(np.float64)
+
+        tanks = collision_index.tanks
+        for slot, tank in enumerate(tanks):
+            scores[hit_tank == slot] = 0 if tank is target else np.inf
+
+        return scores
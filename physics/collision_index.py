@@ -0,0 +1,201 @@
+import copy
+from typing import Iterable
+
+import numpy as np
+
+from objects.building import Building
+from objects.explosion import Explosion
+from objects.tank import Tank
+from utils.constants import BLAST_RADIUS, HIT_RADIUS
+
+CELL_SIZE = 2 * BLAST_RADIUS
+# a tank can only be hit within HIT_RADIUS columns of its centre, so tanks are bucketed by column
+TANK_CELL_SIZE = 2 * HIT_RADIUS
+
+
+class CollisionIndex:
+    def __init__(
+        self,
+        tanks: Iterable[Tank],
+        buildings: Iterable[Building],
+        explosions: Iterable[Explosion] = (),
+    ) -> None:
+        self.tanks = list(tanks)
+        self.buildings = list(buildings)
+        self.explosions: list[Explosion] = []
+
+        self._tank_positions = np.array(
+            [(tank.x_position, tank.y_position) for tank in self.tanks], dtype=np.int64
+        ).reshape(-1, 2)
+        self._tank_cells: dict[int, list[int]] = {}
+        for index, tank in enumerate(self.tanks):
+            self._tank_cells.setdefault(tank.x_position // TANK_CELL_SIZE, []).append(index)
+
+        self._explosion_centers = np.empty((16, 2), dtype=np.int64)
+        self._explosion_cells: dict[tuple[int, int], list[int]] = {}
+        self._owns_explosions = True
+        self._build_skyline()
+
+        for explosion in explosions:
+            self.add_explosion(explosion)
+
+    def fork(self) -> "CollisionIndex":
+        # tanks, buildings and the skyline never change, explosions are copied on first write
+        fork = copy.copy(self)
+        fork._owns_explosions = self._owns_explosions = False
+        return fork
+
+    def truncate_explosions(self, count: int) -> None:
+        if count >= len(self.explosions):
+            return
+
+        self._own_explosions()
+        del self.explosions[count:]
+        for cell, indices in list(self._explosion_cells.items()):
+            indices[:] = [index for index in indices if index < count]
+            if not indices:
+                del self._explosion_cells[cell]
+
+    def add_explosion(self, explosion: Explosion) -> None:
+        self._own_explosions()
+        index = len(self.explosions)
+        if index == len(self._explosion_centers):
+            self._explosion_centers = np.concatenate(
+                (self._explosion_centers, np.empty_like(self._explosion_centers))
+            )
+
+        self.explosions.append(explosion)
+        self._explosion_centers[index] = (explosion.x, explosion.y)
+        self._explosion_cells.setdefault(
+            (explosion.x // CELL_SIZE, explosion.y // CELL_SIZE), []
+        ).append(index)
+
+    def hit(self, x: int, y: int) -> Tank | Building | None:
+        tank = self._hit_tank(x, y)
+        if tank is not None:
+            return tank
+
+        for index in self._explosion_candidates([(x // CELL_SIZE, y // CELL_SIZE)]):
+            if self.explosions[index].is_hit(x, y):
+                return None
+
+        if not self._under_skyline(np.array([x]), np.array([y]))[0]:
+            return None
+
+        return self.buildings[self._skyline_owner[x - self._skyline_offset]]
+
+    def first_hit(self, path: np.ndarray) -> tuple[int, Tank | Building] | None:
+        first, _ = self.first_hits(path[None], np.array([len(path)]))
+        if first[0] < 0:
+            return None
+
+        i = int(first[0])
+        return i, self.hit(int(path[i, 0]), int(path[i, 1]))
+
+    def first_hits(
+        self, paths: np.ndarray, lengths: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        x, y = paths[..., 0], paths[..., 1]
+        in_flight = np.arange(paths.shape[1]) < np.asarray(lengths)[:, None]
+
+        # only tanks near a column the shots pass through can be hit
+        columns = np.unique(x[in_flight].astype(np.int64) // TANK_CELL_SIZE)
+        tank_candidates = np.array(self._tank_candidates(columns.tolist()), dtype=np.int64)
+        positions = self._tank_positions[tank_candidates]
+        tank_hit = (
+            np.abs(x[..., None] - positions[:, 0])
+            + np.abs(y[..., None] - positions[:, 1])
+            < HIT_RADIUS
+        )
+
+        flat_x, flat_y = x.ravel(), y.ravel()
+        building_hit = self._under_skyline(flat_x, flat_y) & in_flight.ravel()
+        candidates = np.flatnonzero(building_hit)
+        if candidates.size > 0:
+            building_hit[candidates[self._in_explosion(flat_x[candidates], flat_y[candidates])]] = False
+
+        hit = (tank_hit.any(axis=-1) & in_flight) | building_hit.reshape(x.shape)
+        has_hit = hit.any(axis=1)
+        first = np.where(has_hit, hit.argmax(axis=1), -1)
+
+        hit_tank = np.full(len(paths), -1)
+        if tank_candidates.size > 0:
+            tanks_at_first = tank_hit[np.arange(len(paths)), np.maximum(first, 0)]
+            hit_tank = np.where(
+                has_hit & tanks_at_first.any(axis=1), tank_candidates[tanks_at_first.argmax(axis=1)], -1
+            )
+
+        return first, hit_tank
+
+    def _own_explosions(self) -> None:
+        if self._owns_explosions:
+            return
+
+        self.explosions = list(self.explosions)
+        self._explosion_centers = self._explosion_centers.copy()
+        self._explosion_cells = {cell: list(indices) for cell, indices in self._explosion_cells.items()}
+        self._owns_explosions = True
+
+    def _hit_tank(self, x: int, y: int) -> Tank | None:
+        for index in self._tank_candidates((x // TANK_CELL_SIZE,)):
+            if self.tanks[index].is_hit(x, y):
+                return self.tanks[index]
+
+        return None
+
+    def _tank_candidates(self, columns: Iterable[int]) -> list[int]:
+        neighbourhood = {column + dx for column in columns for dx in (-1, 0, 1)}
+        return sorted(index for column in neighbourhood for index in self._tank_cells.get(column, ()))
+
+    def _build_skyline(self) -> None:
+        if not self.buildings:
+            self._skyline_offset = 0
+            self._skyline = np.empty(0)
+            self._skyline_owner = np.empty(0, dtype=np.int64)
+            return
+
+        lefts = [building.x_position - building.width // 2 for building in self.buildings]
+        rights = [building.x_position + building.width // 2 for building in self.buildings]
+
+        self._skyline_offset = min(lefts)
+        self._skyline = np.full(max(rights) - self._skyline_offset + 1, -np.inf)
+        # index of the tallest building per column; a point under the skyline hits that building
+        self._skyline_owner = np.full(len(self._skyline), -1, dtype=np.int64)
+        for index, (left, right, building) in enumerate(zip(lefts, rights, self.buildings)):
+            columns = slice(left - self._skyline_offset, right - self._skyline_offset + 1)
+            taller = building.height > self._skyline[columns]
+            self._skyline[columns][taller] = building.height
+            self._skyline_owner[columns][taller] = index
+
+    def _under_skyline(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        columns = x - self._skyline_offset
+        inside = (columns >= 0) & (columns < len(self._skyline))
+
+        under = np.zeros(len(x), dtype=bool)
+        under[inside] = y[inside] < self._skyline[columns[inside]]
+        return under
+
+    def _in_explosion(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        cells = np.unique(np.stack((x // CELL_SIZE, y // CELL_SIZE), axis=1), axis=0)
+        candidates = self._explosion_candidates(map(tuple, cells.tolist()))
+        if not candidates:
+            return np.zeros(len(x), dtype=bool)
+
+        centers = self._explosion_centers[candidates]
+        return (
+            (x[:, None] - centers[:, 0]) ** 2 + (y[:, None] - centers[:, 1]) ** 2
+            < BLAST_RADIUS**2
+        ).any(axis=1)
+
+    def _explosion_candidates(self, cells: Iterable[tuple[int, int]]) -> list[int]:
+        neighbourhood = {
+            (cell_x + dx, cell_y + dy)
+            for cell_x, cell_y in cells
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+        }
+        return sorted(
+            index
+            for cell in neighbourhood
+            for index in self._explosion_cells.get(cell, ())
+        )
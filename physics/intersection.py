@@ -0,0 +1,177 @@
+from typing import Iterable, Literal
+
+import numpy as np
+
+from objects.building import Building
+from objects.explosion import Explosion
+from objects.tank import Tank
+from physics.trajectory import FIRST_STEP, LAST_STEP, parabola_coefficients
+from utils.constants import BLAST_RADIUS, HIT_RADIUS
+
+Interval = tuple[float, float]
+
+
+def trajectory_point(
+    shooter: Tank, angle: int, velocity: int, step: float, direction: Literal[1, -1] | None = None
+) -> tuple[float, float]:
+    direction = direction or shooter.direction
+    quadratic, linear = parabola_coefficients(direction, angle, velocity)
+    return (
+        direction * step + shooter.x_position,
+        float(quadratic * step**2 + linear * step + shooter.y_position),
+    )
+
+
+def earliest_hit(
+    shooter: Tank,
+    angle: int,
+    velocity: int,
+    width: int,
+    tanks: Iterable[Tank],
+    buildings: Iterable[Building],
+    explosions: Iterable[Explosion],
+    direction: Literal[1, -1] | None = None,
+) -> tuple[float, Tank | Building] | None:
+    direction = direction or shooter.direction
+    quadratic, linear = (float(c) for c in parabola_coefficients(direction, angle, velocity))
+    if not (np.isfinite(quadratic) and np.isfinite(linear)):
+        return None
+
+    x0, y0 = shooter.x_position, shooter.y_position
+    start, end = FIRST_STEP, _exit_step(direction, x0, y0, quadratic, linear, width)
+    if end <= start:
+        return None
+
+    hit: tuple[float, Tank | Building] | None = None
+    for tank in tanks:
+        inside: list[Interval] = [(start, end)]
+        for sign_x in (1, -1):
+            for sign_y in (1, -1):
+                inside = _intersect(
+                    inside,
+                    _negative_intervals(
+                        [
+                            sign_y * quadratic,
+                            sign_x * direction + sign_y * linear,
+                            sign_x * (x0 - tank.x_position) + sign_y * (y0 - tank.y_position) - HIT_RADIUS,
+                        ],
+                        start,
+                        end,
+                    ),
+                )
+        if inside and (hit is None or inside[0][0] < hit[0]):
+            hit = inside[0][0], tank
+
+    craters: list[Interval] = []
+    for explosion in explosions:
+        dx, dy = x0 - explosion.x, y0 - explosion.y
+        craters = _union(
+            craters,
+            _negative_intervals(
+                [
+                    quadratic**2,
+                    2 * quadratic * linear,
+                    1 + linear**2 + 2 * quadratic * dy,
+                    2 * direction * dx + 2 * linear * dy,
+                    dx**2 + dy**2 - BLAST_RADIUS**2,
+                ],
+                start,
+                end,
+            ),
+        )
+
+    for building in buildings:
+        left = building.x_position - building.width // 2
+        right = building.x_position + building.width // 2
+        columns = sorted((direction * (left - x0), direction * (right - x0)))
+
+        inside = _intersect(
+            [(max(start, columns[0]), min(end, columns[1]))] if columns[0] < end and columns[1] > start else [],
+            _negative_intervals([quadratic, linear, y0 - building.height], start, end),
+        )
+        inside = _subtract(inside, craters)
+        if inside and (hit is None or inside[0][0] < hit[0]):
+            hit = inside[0][0], building
+
+    return hit
+
+
+def _exit_step(
+    direction: int, x0: float, y0: float, quadratic: float, linear: float, width: int
+) -> float:
+    end = float(LAST_STEP)
+    end = min(end, x0 if direction < 0 else width - x0)
+
+    below_ground = _negative_intervals([quadratic, linear, y0], FIRST_STEP, end)
+    if below_ground:
+        end = below_ground[0][0]
+
+    return end
+
+
+def _negative_intervals(coefficients: list[float], start: float, end: float) -> list[Interval]:
+    coefficients_ = np.trim_zeros(np.asarray(coefficients, dtype=np.float64), "f")
+    if coefficients_.size == 0:
+        return []
+
+    roots = np.roots(coefficients_) if coefficients_.size > 1 else np.empty(0)
+    bounds = [start]
+    bounds += sorted(
+        float(root.real) for root in roots if abs(root.imag) < 1e-9 and start < root.real < end
+    )
+    bounds.append(end)
+
+    intervals: list[Interval] = []
+    for lower, upper in zip(bounds, bounds[1:]):
+        if upper <= lower or np.polyval(coefficients_, (lower + upper) / 2) >= 0:
+            continue
+        if intervals and intervals[-1][1] == lower:
+            intervals[-1] = intervals[-1][0], upper
+        else:
+            intervals.append((lower, upper))
+
+    return intervals
+
+
+def _intersect(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    intervals: list[Interval] = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        lower = max(first[i][0], second[j][0])
+        upper = min(first[i][1], second[j][1])
+        if lower < upper:
+            intervals.append((lower, upper))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+
+    return intervals
+
+
+def _union(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    intervals: list[Interval] = []
+    for lower, upper in sorted(first + second):
+        if intervals and lower <= intervals[-1][1]:
+            intervals[-1] = intervals[-1][0], max(intervals[-1][1], upper)
+        else:
+            intervals.append((lower, upper))
+
+    return intervals
+
+
+def _subtract(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    intervals: list[Interval] = []
+    for lower, upper in first:
+        for hole_lower, hole_upper in second:
+            if hole_upper <= lower or hole_lower >= upper:
+                continue
+            if hole_lower > lower:
+                intervals.append((lower, hole_lower))
+            lower = max(lower, hole_upper)
+            if lower >= upper:
+                break
+        if lower < upper:
+            intervals.append((lower, upper))
+
+    return intervals
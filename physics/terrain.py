@@ -0,0 +1,111 @@
+from typing import Iterable
+
+import numpy as np
+
+from objects.building import Building
+from objects.explosion import Explosion
+from objects.tank import Tank
+from output.drawable import Rectangle
+from physics.collision_index import CollisionIndex
+from utils.constants import BLAST_RADIUS
+
+_OFFSETS = np.arange(-BLAST_RADIUS, BLAST_RADIUS + 1)
+CRATER = _OFFSETS[:, None] ** 2 + _OFFSETS[None, :] ** 2 < BLAST_RADIUS**2
+
+
+class HeightmapTerrain(CollisionIndex):
+    def __init__(
+        self,
+        tanks: Iterable[Tank],
+        buildings: Iterable[Building],
+        explosions: Iterable[Explosion] = (),
+        width: int = 595,
+        height: int = 375,
+        occupancy: np.ndarray | None = None,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self._initial_occupancy = occupancy
+        super().__init__(tanks, buildings, explosions)
+
+    def add_explosion(self, explosion: Explosion) -> None:
+        self._own_explosions()
+        self.explosions.append(explosion)
+        self._carve(explosion.x, explosion.y)
+
+    def truncate_explosions(self, count: int) -> None:
+        if count >= len(self.explosions):
+            return
+
+        self._own_explosions()
+        explosions = self.explosions[:count]
+        self.explosions = []
+        self._build_skyline()
+        for explosion in explosions:
+            self.add_explosion(explosion)
+
+    def hit(self, x: int, y: int) -> "Tank | HeightmapTerrain | None":
+        tank = self._hit_tank(x, y)
+        if tank is not None:
+            return tank
+
+        if self._under_skyline(np.array([x]), np.array([y]))[0]:
+            return self
+
+        return None
+
+    def rectangles(self) -> list[Rectangle]:
+        rectangles: list[Rectangle] = []
+        solid = np.zeros((self.height + 2, self.width), dtype=np.int8)
+        solid[1:-1] = self.occupancy
+        edges = np.diff(solid, axis=0)
+
+        runs = [tuple(np.flatnonzero(edges[:, x]).tolist()) for x in range(self.width)]
+        start = 0
+        for x in range(1, self.width + 1):
+            if x < self.width and runs[x] == runs[start]:
+                continue
+            for bottom, top in zip(runs[start][::2], runs[start][1::2]):
+                rectangles.append(Rectangle(top_left=(start, top), bottom_right=(x - 1, bottom)))
+            start = x
+
+        return rectangles
+
+    def _own_explosions(self) -> None:
+        if not self._owns_explosions:
+            self.occupancy = self.occupancy.copy()
+        super()._own_explosions()
+
+    def _build_skyline(self) -> None:
+        if self._initial_occupancy is not None:
+            self.occupancy = self._initial_occupancy.astype(bool, copy=True)
+            return
+
+        self.occupancy = np.zeros((self.height, self.width), dtype=bool)
+        for building in self.buildings:
+            left = max(building.x_position - building.width // 2, 0)
+            right = min(building.x_position + building.width // 2, self.width - 1)
+            self.occupancy[: max(building.height, 0), left : right + 1] = True
+
+    def _under_skyline(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        inside = (x >= 0) & (x < self.width) & (y < self.height)
+        # the ground below the arena counts as the bottom row, like a building's base does
+        rows = np.clip(y, 0, self.height - 1)
+        columns = np.clip(x, 0, self.width - 1)
+
+        return inside & self.occupancy[rows, columns]
+
+    def _in_explosion(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return np.zeros(len(x), dtype=bool)
+
+    def _carve(self, x: int, y: int) -> None:
+        bottom, top = max(y - BLAST_RADIUS, 0), min(y + BLAST_RADIUS + 1, self.height)
+        left, right = max(x - BLAST_RADIUS, 0), min(x + BLAST_RADIUS + 1, self.width)
+        if bottom >= top or left >= right:
+            return
+
+        crater = CRATER[
+            bottom - y + BLAST_RADIUS : top - y + BLAST_RADIUS,
+            left - x + BLAST_RADIUS : right - x + BLAST_RADIUS,
+        ]
+        self.occupancy[bottom:top, left:right] &= ~crater
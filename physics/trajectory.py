@@ -0,0 +1,48 @@
+import numpy as np
+import numpy.typing as npt
+
+from utils.constants import HIT_RADIUS
+from utils.units import GRAVITATIONAL_CONSTANT
+
+FIRST_STEP = HIT_RADIUS + 2
+LAST_STEP = 1000
+STEPS = np.arange(FIRST_STEP, LAST_STEP, dtype=np.float64)
+# far outside any arena, and small enough to cast to int32 for drawing
+MAX_HEIGHT = 2**20
+
+
+def parabola_coefficients(
+    direction: npt.ArrayLike, angles: npt.ArrayLike, velocities: npt.ArrayLike
+) -> tuple[np.ndarray, np.ndarray]:
+    angle_ = np.asarray(direction) * np.asarray(angles) * np.pi / 180
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quadratic = -GRAVITATIONAL_CONSTANT / (2 * np.asarray(velocities) * np.cos(angle_) ** 2)
+    linear = np.tan(angle_ * direction)
+
+    return quadratic, linear
+
+
+def compute_trajectories(
+    x_position: npt.ArrayLike,
+    y_position: npt.ArrayLike,
+    direction: npt.ArrayLike,
+    angles: npt.ArrayLike,
+    velocities: npt.ArrayLike,
+    width: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    x_position, y_position, direction, angles, velocities = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (x_position, y_position, direction, angles, velocities))
+    )
+    quadratic, linear = parabola_coefficients(direction, angles, velocities)
+
+    x = direction[..., None] * STEPS + x_position[..., None]
+    with np.errstate(invalid="ignore"):
+        y = quadratic[..., None] * STEPS**2 + STEPS * linear[..., None] + y_position[..., None]
+
+    # a flight ends with (and includes) the first point that leaves the arena
+    outside = (x < 0) | (x >= width) | ~(y >= 0)
+    lengths = np.where(outside.any(axis=-1), outside.argmax(axis=-1) + 1, STEPS.size)
+    # non-finite heights (angle 90, force 0) count as below the floor; clipped heights stay outside the arena
+    y = np.clip(np.where(np.isfinite(y), y, -MAX_HEIGHT), -MAX_HEIGHT, MAX_HEIGHT)
+
+    return np.stack((x, y), axis=-1), lengths
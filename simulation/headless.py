@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+from game import TwoPlayerTankGame
+from game_record import GameRecord
+from output.null_device import NullOutputDevice
+from output.output_device import OutputDevice
+
+Strategy = Callable[[TwoPlayerTankGame], tuple[int, int]]
+
+
+@dataclass
+class GameResult:
+    seed: int
+    winner: int | None
+    turns: int
+    record: GameRecord | None = None
+
+
+class HeadlessTankGame(TwoPlayerTankGame):
+    def __init__(
+        self,
+        strategies: dict[int, Strategy],
+        number_of_buildings: int = 5,
+        max_turns: int = 200,
+        exact_collisions: bool = False,
+        seed: int | None = None,
+        output: OutputDevice | None = None,
+        terrain: Literal["objects", "heightmap"] = "objects",
+        width: int = 595,
+        height: int = 375,
+    ) -> None:
+        super().__init__(
+            output=output or NullOutputDevice(),
+            exact_collisions=exact_collisions,
+            terrain=terrain,
+            seed=seed,
+            number_of_buildings=number_of_buildings,
+            width=width,
+            height=height,
+        )
+        self.strategies = strategies
+        self.max_turns = max_turns
+        self.turns = 0
+
+    def start_game(self) -> None:
+        self.create_world()
+
+        while not self.game_over and self.turns < self.max_turns:
+            angle, force = self._get_command()
+            self.play_turn(angle, force)
+            self.turns += 1
+
+        self.output_device.wait_idle()
+
+    def announce_winner(self) -> None:
+        pass
+
+    def _get_command(self) -> tuple[int, int]:
+        return self.strategies[self.active_player](self)
+
+
+def play_game(
+    strategies: dict[int, Strategy],
+    seed: int,
+    number_of_buildings: int = 5,
+    max_turns: int = 200,
+    exact_collisions: bool = False,
+) -> GameResult:
+    game = HeadlessTankGame(strategies, number_of_buildings, max_turns, exact_collisions, seed=seed)
+    game.start_game()
+
+    return GameResult(seed=seed, winner=game.winner, turns=game.turns, record=game.record)
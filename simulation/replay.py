@@ -0,0 +1,36 @@
+from game_record import GameRecord
+from output.output_device import OutputDevice
+from simulation.headless import GameResult, HeadlessTankGame
+
+
+class ReplayTankGame(HeadlessTankGame):
+    def __init__(self, record: GameRecord, output: OutputDevice | None = None) -> None:
+        if record.number_of_players != HeadlessTankGame.number_of_players:
+            raise ValueError(f"Cannot replay a game of {record.number_of_players} players")
+
+        super().__init__(
+            {},
+            record.number_of_buildings,
+            max_turns=len(record.turns),
+            exact_collisions=record.exact_collisions,
+            seed=record.seed,
+            output=output,
+            terrain=record.terrain,
+            width=record.width,
+            height=record.height,
+        )
+        self.recorded_turns = iter(record.turns)
+
+    def _get_command(self) -> tuple[int, int]:
+        player, angle, force = next(self.recorded_turns)
+        if player != self.active_player:
+            raise ValueError(f"Recorded turn for player {player}, but player {self.active_player} is active")
+
+        return angle, force
+
+
+def replay(record: GameRecord, output: OutputDevice | None = None) -> GameResult:
+    game = ReplayTankGame(record, output)
+    game.start_game()
+
+    return GameResult(seed=record.seed, winner=game.winner, turns=game.turns, record=game.record)
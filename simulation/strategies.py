@@ -0,0 +1,9 @@
+from game import TwoPlayerTankGame
+
+
+def random_strategy(game: TwoPlayerTankGame) -> tuple[int, int]:
+    return game.random.randint(10, 80), game.random.randint(50, 3000)
+
+
+def aiming_strategy(game: TwoPlayerTankGame) -> tuple[int, int]:
+    return game.solve_aim(time_budget=0.2)
@@ -0,0 +1,77 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+
+from simulation.headless import GameResult, Strategy, play_game
+from simulation.strategies import random_strategy
+
+
+@dataclass
+class TournamentResult:
+    games: int = 0
+    wins: dict[int, int] = field(default_factory=lambda: {1: 0, -1: 0})
+    draws: int = 0
+    total_turns: int = 0
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        self.total_turns += result.turns
+        if result.winner is None:
+            self.draws += 1
+        else:
+            self.wins[result.winner] += 1
+
+    @property
+    def win_rates(self) -> dict[int, float]:
+        return {player: wins / max(self.games, 1) for player, wins in self.wins.items()}
+
+    @property
+    def turns_per_game(self) -> float:
+        return self.total_turns / max(self.games, 1)
+
+
+def run_tournament(
+    strategies: dict[int, Strategy],
+    games: int,
+    seed: int = 0,
+    processes: int | None = None,
+    number_of_buildings: int = 5,
+    max_turns: int = 200,
+    exact_collisions: bool = False,
+) -> TournamentResult:
+    play = partial(
+        play_game,
+        strategies,
+        number_of_buildings=number_of_buildings,
+        max_turns=max_turns,
+        exact_collisions=exact_collisions,
+    )
+    seeds = range(seed, seed + games)
+
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, games // (4 * processes))
+
+    result = TournamentResult()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for game_result in executor.map(play, seeds, chunksize=chunksize):
+            result.add(game_result)
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run seeded headless KAtapult games")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    tournament = run_tournament(
+        {1: random_strategy, -1: random_strategy}, args.games, args.seed, args.processes
+    )
+    print(f"games: {tournament.games}, draws: {tournament.draws}")
+    for player, rate in tournament.win_rates.items():
+        print(f"player {player} win rate: {rate:.3f}")
+    print(f"turns per game: {tournament.turns_per_game:.1f}")
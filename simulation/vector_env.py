@@ -0,0 +1,158 @@
+import random
+
+import numpy as np
+import numpy.typing as npt
+
+from game import TwoPlayerTankGame
+from output.null_device import NullOutputDevice
+from physics.trajectory import compute_trajectories
+from utils.constants import BLAST_RADIUS, HIT_RADIUS
+
+
+class VectorTankEnv:
+    def __init__(
+        self, number_of_games: int, number_of_buildings: int = 5, seed: int | None = None
+    ) -> None:
+        self.number_of_games = number_of_games
+        self.number_of_buildings = number_of_buildings
+
+        self.reset(seed)
+
+    def reset(self, seed: int | None = None) -> None:
+        seeds = random.Random(seed)
+
+        games = []
+        for _ in range(self.number_of_games):
+            game = TwoPlayerTankGame(output=NullOutputDevice(), seed=seeds.getrandbits(64))
+            game.create_buildings(self.number_of_buildings)
+            game.place_tanks()
+            games.append(game)
+
+        self.width, self.height = games[0].width, games[0].height
+        shape = (self.number_of_games, self.number_of_buildings)
+
+        # unused building slots stay empty: no column satisfies left <= x <= right
+        self.building_left = np.ones(shape, dtype=np.int64)
+        self.building_right = np.zeros(shape, dtype=np.int64)
+        self.building_height = np.zeros(shape, dtype=np.int64)
+        for n, game in enumerate(games):
+            for b, building in enumerate(game.buildings):
+                self.building_left[n, b] = building.x_position - building.width // 2
+                self.building_right[n, b] = building.x_position + building.width // 2
+                self.building_height[n, b] = building.height
+
+        # per-column building tops, so a building test is one gather per point
+        self.skyline = np.full((self.number_of_games, self.width), np.iinfo(np.int64).min)
+        columns = np.arange(self.width)
+        for b in range(self.number_of_buildings):
+            covered = (self.building_left[:, b, None] <= columns) & (columns <= self.building_right[:, b, None])
+            self.skyline = np.where(
+                covered, np.maximum(self.skyline, self.building_height[:, b, None]), self.skyline
+            )
+
+        # tank slot 0 belongs to player 1, slot 1 to player -1
+        self.tank_positions = np.array(
+            [
+                [(game.tanks[player].x_position, game.tanks[player].y_position) for player in (1, -1)]
+                for game in games
+            ],
+            dtype=np.int64,
+        ).reshape(self.number_of_games, 2, 2)
+
+        self.explosion_centers = np.zeros((self.number_of_games, 16, 2), dtype=np.int64)
+        self.explosion_count = np.zeros(self.number_of_games, dtype=np.int64)
+
+        self.active_player = np.ones(self.number_of_games, dtype=np.int64)
+        self.game_over = np.zeros(self.number_of_games, dtype=bool)
+        self.winner = np.zeros(self.number_of_games, dtype=np.int64)
+        self.turns = np.zeros(self.number_of_games, dtype=np.int64)
+
+    def step(
+        self, angles: npt.ArrayLike, forces: npt.ArrayLike
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rewards = np.zeros(self.number_of_games, dtype=np.float32)
+        games = np.flatnonzero(~self.game_over)
+        if games.size == 0:
+            return rewards, self.game_over.copy()
+
+        angles = np.broadcast_to(np.asarray(angles), (self.number_of_games,))[games]
+        forces = np.broadcast_to(np.asarray(forces), (self.number_of_games,))[games]
+        players = self.active_player[games]
+        shooters = self.tank_positions[games, (players == -1).astype(np.int64)]
+
+        trajectories, lengths = compute_trajectories(
+            shooters[:, 0], shooters[:, 1], players, angles, forces * 10, self.width
+        )
+        with np.errstate(invalid="ignore"):
+            trajectories = trajectories.astype(np.int64)
+        x, y = trajectories[..., 0], trajectories[..., 1]
+        in_flight = np.arange(x.shape[1]) < lengths[:, None]
+
+        tanks = self.tank_positions[games]
+        tank_hit = (
+            np.abs(x[..., None] - tanks[:, None, :, 0])
+            + np.abs(y[..., None] - tanks[:, None, :, 1])
+            < HIT_RADIUS
+        )
+
+        in_arena = (x >= 0) & (x < self.width)
+        building_hit = in_flight & in_arena & (
+            y < np.take_along_axis(self.skyline[games], np.clip(x, 0, self.width - 1), axis=1)
+        )
+        building_hit &= ~self._in_explosion(games, x, y, building_hit)
+
+        hit = (tank_hit.any(axis=-1) & in_flight) | building_hit
+        has_hit = hit.any(axis=1)
+        first = hit.argmax(axis=1)
+
+        rows = np.arange(games.size)
+        hit_x, hit_y = x[rows, first], y[rows, first]
+        first_tank_hit = tank_hit[rows, first]
+        hits_tank = has_hit & first_tank_hit.any(axis=1)
+        hits_building = has_hit & ~hits_tank
+
+        # tank slot 0 is player 1, so hitting it hands the win to player -1
+        winners = np.where(first_tank_hit.argmax(axis=1) == 0, -1, 1)
+        rewards[games[hits_tank]] = np.where(winners[hits_tank] == players[hits_tank], 1.0, -1.0)
+        self.winner[games[hits_tank]] = winners[hits_tank]
+        self.game_over[games[hits_tank]] = True
+
+        self._add_explosions(games[hits_building], hit_x[hits_building], hit_y[hits_building])
+
+        self.turns[games] += 1
+        self.active_player[games] *= -1
+
+        return rewards, self.game_over.copy()
+
+    def _in_explosion(
+        self, games: np.ndarray, x: np.ndarray, y: np.ndarray, candidates: np.ndarray
+    ) -> np.ndarray:
+        in_explosion = np.zeros(x.shape, dtype=bool)
+        count = int(self.explosion_count[games].max(initial=0))
+        if count == 0:
+            return in_explosion
+
+        rows, steps = np.nonzero(candidates)
+        centers = self.explosion_centers[games[rows], :count]
+        inside = (
+            (x[rows, steps, None] - centers[..., 0]) ** 2
+            + (y[rows, steps, None] - centers[..., 1]) ** 2
+            < BLAST_RADIUS**2
+        )
+        inside &= np.arange(count) < self.explosion_count[games[rows], None]
+        in_explosion[rows, steps] = inside.any(axis=-1)
+
+        return in_explosion
+
+    def _add_explosions(self, games: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        if games.size == 0:
+            return
+
+        capacity = self.explosion_centers.shape[1]
+        if self.explosion_count[games].max() >= capacity:
+            self.explosion_centers = np.concatenate(
+                (self.explosion_centers, np.zeros_like(self.explosion_centers)), axis=1
+            )
+
+        self.explosion_centers[games, self.explosion_count[games]] = np.stack((x, y), axis=1)
+        self.explosion_count[games] += 1
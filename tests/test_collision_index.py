@@ -0,0 +1,31 @@
+import numpy as np
+
+from objects.building import Building
+from objects.tank import Tank
+from physics.collision_index import CollisionIndex
+
+
+def horizontal_path(y: int, start: int, end: int) -> np.ndarray:
+    return np.array([(x, y) for x in range(start, end)], dtype=np.int64)
+
+
+def test_first_hits_tank_without_buildings():
+    index = CollisionIndex([Tank(10, 50), Tank(200, 50)], [])
+    path = horizontal_path(50, 100, 300)
+
+    first, hit_tank = index.first_hits(path[None], np.array([len(path)]))
+
+    assert first[0] >= 0
+    assert hit_tank[0] == 1
+    assert index.first_hit(path)[1] is index.tanks[1]
+
+
+def test_first_hits_building_without_tank_candidates():
+    index = CollisionIndex([Tank(10, 50)], [Building(400, 100)])
+    path = horizontal_path(50, 300, 500)
+
+    first, hit_tank = index.first_hits(path[None], np.array([len(path)]))
+
+    assert path[first[0], 0] == 400 - 30 // 2
+    assert hit_tank[0] == -1
+    assert index.first_hit(path)[1] is index.buildings[0]
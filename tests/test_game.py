@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from game import NPlayerTankGame, TwoPlayerTankGame
+from output.async_device import AsyncOutputDevice
+from output.null_device import NullOutputDevice
+from output.screen_plotter import ScreenPlotter
+from physics.aiming import Aim, AimSolver
+
+
+@pytest.fixture
+def screen_plotter(monkeypatch):
+    monkeypatch.setattr(cv2, "imshow", lambda *args: None)
+    monkeypatch.setattr(cv2, "waitKey", lambda *args: -1)
+    return ScreenPlotter(np.zeros((375, 595), dtype=np.uint8), 595, 375)
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("exact_collisions", [False, True])
+@pytest.mark.parametrize("angle,force", [(90, 50), (45, 0)])
+def test_degenerate_shot_draws_on_screen(screen_plotter, exact_collisions, angle, force):
+    game = TwoPlayerTankGame(screen_plotter, exact_collisions=exact_collisions, seed=1)
+    game.create_world()
+
+    game.play_turn(angle, force)
+
+    assert not game.game_over
+    assert game.active_player == -1
+
+
+def test_asynchronous_output_keeps_screen_on_main_thread(screen_plotter):
+    game = TwoPlayerTankGame(screen_plotter, asynchronous_output=True)
+
+    assert game.output_device is screen_plotter
+
+
+def test_asynchronous_output_wraps_other_devices():
+    game = TwoPlayerTankGame(NullOutputDevice(), asynchronous_output=True)
+
+    assert isinstance(game.output_device, AsyncOutputDevice)
+
+
+@pytest.mark.parametrize("game_class", [TwoPlayerTankGame, NPlayerTankGame])
+def test_solve_aim_resolves_with_larger_budget(monkeypatch, game_class):
+    budgets = []
+
+    def solve(solver, *args):
+        budgets.append(solver.time_budget)
+        return Aim(45, 100 * len(budgets), 10.0 / len(budgets))
+
+    monkeypatch.setattr(AimSolver, "solve", solve)
+    game = game_class(output=NullOutputDevice(), seed=2)
+    game.create_world()
+
+    first = game.solve_aim(time_budget=0.01)
+    better = game.solve_aim(time_budget=1.0)
+
+    assert budgets == [0.01, 1.0]
+    assert better != first
+    assert game.solve_aim(time_budget=0.5) == better
+    assert budgets == [0.01, 1.0]
+
+
+@pytest.mark.parametrize("angle,direction,expected", [(30, None, (30, 1)), (150, None, (30, -1)), (30, -1, (30, -1))])
+def test_n_player_shoot_resolves_direction(monkeypatch, angle, direction, expected):
+    shots = []
+
+    def shoot(game, angle, force, direction=None):
+        shots.append((angle, direction))
+
+    monkeypatch.setattr(TwoPlayerTankGame, "shoot", shoot)
+    game = NPlayerTankGame(output=NullOutputDevice(), seed=2)
+
+    game.shoot(angle, 50, direction)
+
+    assert shots == [expected]
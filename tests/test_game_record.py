@@ -0,0 +1,61 @@
+import pytest
+
+from game_record import HEADER, GameRecord
+from simulation.headless import HeadlessTankGame
+from simulation.replay import ReplayTankGame, replay
+from simulation.strategies import random_strategy
+
+
+def test_round_trip_keeps_game_settings():
+    record = GameRecord(7, 300, ((1, 45, 60), (-1, 30, 80)), 2, "heightmap", True, 800, 400)
+
+    assert GameRecord.from_bytes(record.to_bytes()) == record
+
+
+@pytest.mark.parametrize("size", [0, 3, HEADER.size - 1, HEADER.size + 3])
+def test_truncated_record_raises_value_error(size):
+    data = GameRecord(7, 5, ((1, 45, 60),)).to_bytes()
+
+    with pytest.raises(ValueError):
+        GameRecord.from_bytes(data[:size])
+
+
+@pytest.mark.parametrize("terrain,exact_collisions,width", [("objects", True, 800), ("heightmap", False, 595)])
+def test_replay_reproduces_game_settings(terrain, exact_collisions, width):
+    game = HeadlessTankGame(
+        {1: random_strategy, -1: random_strategy},
+        max_turns=20,
+        exact_collisions=exact_collisions,
+        seed=3,
+        terrain=terrain,
+        width=width,
+    )
+    game.start_game()
+
+    result = replay(GameRecord.from_bytes(game.record.to_bytes()))
+
+    assert (result.winner, result.turns, result.record) == (game.winner, game.turns, game.record)
+
+
+def test_replay_rejects_other_player_counts():
+    with pytest.raises(ValueError):
+        replay(GameRecord(7, 5, (), number_of_players=4))
+
+
+def test_record_after_restore_replays_game():
+    game = HeadlessTankGame({}, seed=5)
+    game.create_world()
+    game.play_turn(40, 60)
+    state = game.snapshot()
+    game.play_turn(30, 80)
+    game.play_turn(50, 80)
+    game.restore(state)
+    game.play_turn(60, 80)
+
+    replayed = ReplayTankGame(game.record)
+    replayed.start_game()
+
+    assert len(game.record.turns) == 2
+    assert replayed.record == game.record
+    assert [(e.x, e.y) for e in replayed.explosions] == [(e.x, e.y) for e in game.explosions]
+    assert replayed.active_player == game.active_player
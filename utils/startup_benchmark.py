@@ -0,0 +1,41 @@
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["game", "simulation.headless", "output.screen_plotter", "output.axidraw_plotter"]
+
+
+def import_times(module: str) -> dict[str, int]:
+    # fresh interpreter per module, so nothing is already cached in sys.modules
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
+
+    # "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+
+    return cumulative
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report KAtapult import time per module")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times = import_times(module)
+        print(f"{module}: {times.get(module, 0) / 1000:.1f} ms")
+        slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative_us in slowest[1: args.top + 1]:
+            print(f"    {name:<40} {cumulative_us / 1000:8.1f} ms")
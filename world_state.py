@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+from objects.building import Building
+from objects.explosion import Explosion
+from objects.tank import Tank
+
+
+@dataclass(frozen=True, slots=True)
+class WorldState:
+    tanks: tuple[tuple[int, Tank], ...]
+    buildings: tuple[Building, ...]
+    explosions: tuple[Explosion, ...]
+    active_player: int
+    game_over: bool
+    winner: int | None
+    shots: tuple[tuple[int, int, int], ...]